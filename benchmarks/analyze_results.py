@@ -4,11 +4,18 @@ Analysis script for SQL Query Optimization Benchmarking.
 Aggregates benchmark results and generates comparative metrics.
 """
 
+import os
 import json
-import csv
 import argparse
+from collections import namedtuple
 from pathlib import Path
 from typing import Dict, List, Any, Optional
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # optional dependency, fall back to the stdlib parser
+    orjson = None
 
 # Directories
 RESULTS_DIR = Path(__file__).parent.parent / "results" / "metrics"
@@ -17,17 +24,30 @@ RESULTS_DIR = Path(__file__).parent.parent / "results" / "metrics"
 SCALES = ["small", "medium", "large"]
 INDEX_CONFIGS = ["no_index", "with_index"]
 
+# Latency metrics compared in the summary
+METRICS = ["p50", "p95", "mean"]
+
+# Latency statistics of one query in one results file
+QueryMetrics = namedtuple("QueryMetrics", "p50 p95 mean min max")
+
+# Manifest of input file stats from the last successful analysis
+CACHE_FILENAME = ".analyze_cache.json"
 
-def load_latency_results(scale: str, index_config: str) -> Optional[Dict[str, Any]]:
+
+def load_and_index_results(scale: str, index_config: str) -> Optional[Dict[int, Dict[str, Any]]]:
     """
-    Load latency benchmark results from JSON file.
+    Load latency benchmark results and index them by query number.
+    
+    The description and metrics of every query are extracted in the same
+    pass, so later lookups are plain dictionary accesses.
     
     Args:
         scale: Dataset scale (small, medium, large)
         index_config: Index configuration (no_index, with_index)
     
     Returns:
-        Dictionary with results or None if file doesn't exist
+        Dictionary mapping query number to {"description", "metrics"},
+        or None if the file doesn't exist or can't be parsed
     """
     filename = f"latency_{index_config}_{scale}.json"
     filepath = RESULTS_DIR / filename
@@ -36,75 +56,117 @@ def load_latency_results(scale: str, index_config: str) -> Optional[Dict[str, An
         return None
     
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
+        if orjson is not None:
+            # orjson parses bytes directly, so skip the text-mode decode
+            with open(filepath, "rb") as f:
+                results = orjson.loads(f.read())
+        else:
+            with open(filepath, "r", encoding="utf-8") as f:
+                results = json.load(f)
     except Exception as e:
         print(f"Error loading {filepath}: {e}")
         return None
+    
+    indexed = {}
+    for query_result in results.get("queries", []):
+        stats = query_result.get("statistics", {})
+        indexed[query_result.get("query_number")] = {
+            "description": query_result.get("description") or None,
+            "metrics": QueryMetrics(
+                stats.get("p50"),
+                stats.get("p95"),
+                stats.get("mean"),
+                stats.get("min"),
+                stats.get("max"),
+            ),
+        }
+    return indexed
 
 
-def calculate_speedup(no_index_value: float, with_index_value: float) -> Optional[float]:
+def build_input_manifest(scales: List[str], configs: List[str]) -> Dict[str, Any]:
     """
-    Calculate speedup ratio (no_index / with_index).
+    Stat every latency results file that analysis reads.
     
     Args:
-        no_index_value: Metric value without index
-        with_index_value: Metric value with index
+        scales: Scales selected for analysis
+        configs: Index configurations selected for analysis
     
     Returns:
-        Speedup ratio or None if calculation not possible
+        Dictionary with the selection and a mapping of filename to
+        [mtime_ns, size] for existing files
     """
-    if with_index_value is None or with_index_value == 0:
-        return None
-    if no_index_value is None:
-        return None
-    return no_index_value / with_index_value
+    files = {}
+    for scale in scales:
+        for index_config in configs:
+            filename = f"latency_{index_config}_{scale}.json"
+            try:
+                stat = (RESULTS_DIR / filename).stat()
+            except FileNotFoundError:
+                continue
+            files[filename] = [stat.st_mtime_ns, stat.st_size]
+    return {"scales": scales, "configs": configs, "files": files}
 
 
-def extract_query_metrics(results: Dict[str, Any], query_num: int) -> Optional[Dict[str, float]]:
+def is_up_to_date(manifest: Dict[str, Any]) -> bool:
     """
-    Extract metrics for a specific query from results.
+    Check whether summary.csv was produced from exactly these input files.
     
     Args:
-        results: Results dictionary from JSON file
-        query_num: Query number to extract
+        manifest: Current input manifest from build_input_manifest()
     
     Returns:
-        Dictionary with metrics or None if query not found
+        True if the cached manifest matches and the summary exists
     """
-    if "queries" not in results:
-        return None
+    cache_file = RESULTS_DIR / CACHE_FILENAME
+    if not (RESULTS_DIR / "summary.csv").exists() or not cache_file.exists():
+        return False
     
-    for query_result in results["queries"]:
-        if query_result.get("query_number") == query_num:
-            stats = query_result.get("statistics", {})
-            return {
-                "p50": stats.get("p50"),
-                "p95": stats.get("p95"),
-                "mean": stats.get("mean"),
-                "min": stats.get("min"),
-                "max": stats.get("max"),
-            }
-    
-    return None
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f) == manifest
+    except (OSError, ValueError):
+        return False
+
+
+def save_manifest(manifest: Dict[str, Any]):
+    """Record the input manifest used for the current summary.csv."""
+    with open(RESULTS_DIR / CACHE_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
 
 
-def analyze_results():
+def analyze_results(force: bool = False,
+                    scales: Optional[List[str]] = None,
+                    configs: Optional[List[str]] = None):
     """
     Analyze all benchmark results and generate summary CSV.
+    
+    Args:
+        force: Reanalyze even if no results file changed since the last run
+        scales: Scales to analyze (default: all)
+        configs: Index configurations to load (default: all)
     """
+    scales = [scale for scale in SCALES if scale in (scales or SCALES)]
+    configs = [config for config in INDEX_CONFIGS if config in (configs or INDEX_CONFIGS)]
+    
     print("Analyzing benchmark results...")
     print(f"Results directory: {RESULTS_DIR}")
     print()
     
+    # Skip the whole analysis when the inputs are unchanged since the last run
+    manifest = build_input_manifest(scales, configs)
+    if not force and manifest["files"] and is_up_to_date(manifest):
+        print(f"Summary is up to date: {RESULTS_DIR / 'summary.csv'}")
+        print("Use --force to reanalyze.")
+        return True
+    
     # Collect all available results
     all_results = {}
     
-    for scale in SCALES:
+    for scale in scales:
         all_results[scale] = {}
-        for index_config in INDEX_CONFIGS:
-            results = load_latency_results(scale, index_config)
-            if results:
+        for index_config in configs:
+            results = load_and_index_results(scale, index_config)
+            if results is not None:
                 all_results[scale][index_config] = results
                 print(f"Loaded: latency_{index_config}_{scale}.json")
             else:
@@ -114,13 +176,9 @@ def analyze_results():
     
     # Extract all query numbers from available results
     query_numbers = set()
-    for scale in SCALES:
-        for index_config in INDEX_CONFIGS:
-            if scale in all_results and index_config in all_results[scale]:
-                results = all_results[scale][index_config]
-                if "queries" in results:
-                    for query_result in results["queries"]:
-                        query_numbers.add(query_result.get("query_number"))
+    for scale in scales:
+        for results in all_results[scale].values():
+            query_numbers.update(results)
     
     if not query_numbers:
         print("Error: No benchmark results found!")
@@ -130,75 +188,62 @@ def analyze_results():
     print(f"Found {len(query_numbers)} queries across all results")
     print()
     
-    # Prepare summary data
-    summary_rows = []
-    
-    for scale in SCALES:
-        for query_num in query_numbers:
-            # Get metrics for both configurations
-            no_index_metrics = None
-            with_index_metrics = None
-            
-            if scale in all_results and "no_index" in all_results[scale]:
-                no_index_metrics = extract_query_metrics(
-                    all_results[scale]["no_index"], query_num
-                )
-            
-            if scale in all_results and "with_index" in all_results[scale]:
-                with_index_metrics = extract_query_metrics(
-                    all_results[scale]["with_index"], query_num
-                )
-            
-            # Get query description
-            description = None
-            if scale in all_results:
-                for config in INDEX_CONFIGS:
-                    if config in all_results[scale]:
-                        results = all_results[scale][config]
-                        if "queries" in results:
-                            for query_result in results["queries"]:
-                                if query_result.get("query_number") == query_num:
-                                    description = query_result.get("description", "")
-                                    break
-                        if description:
-                            break
-            
-            # Calculate speedups
-            p50_speedup = None
-            p95_speedup = None
-            mean_speedup = None
-            
-            if no_index_metrics and with_index_metrics:
-                p50_speedup = calculate_speedup(
-                    no_index_metrics.get("p50"),
-                    with_index_metrics.get("p50")
-                )
-                p95_speedup = calculate_speedup(
-                    no_index_metrics.get("p95"),
-                    with_index_metrics.get("p95")
-                )
-                mean_speedup = calculate_speedup(
-                    no_index_metrics.get("mean"),
-                    with_index_metrics.get("mean")
-                )
-            
-            # Build row
-            row = {
-                "scale": scale,
-                "query_number": query_num,
-                "description": description or "",
-                "no_index_p50_ms": no_index_metrics.get("p50") if no_index_metrics else None,
-                "no_index_p95_ms": no_index_metrics.get("p95") if no_index_metrics else None,
-                "no_index_mean_ms": no_index_metrics.get("mean") if no_index_metrics else None,
-                "with_index_p50_ms": with_index_metrics.get("p50") if with_index_metrics else None,
-                "with_index_p95_ms": with_index_metrics.get("p95") if with_index_metrics else None,
-                "with_index_mean_ms": with_index_metrics.get("mean") if with_index_metrics else None,
-                "p50_speedup": p50_speedup,
-                "p95_speedup": p95_speedup,
-                "mean_speedup": mean_speedup,
-            }
-            
-            summary_rows.append(row)
+    # Build a long table: one row per (scale, query, configuration)
+    records = []
+    for scale in scales:
+        for index_config, results in all_results[scale].items():
+            for query_num, entry in results.items():
+                records.append((
+                    scale,
+                    query_num,
+                    index_config,
+                    entry["description"],
+                    *entry["metrics"],
+                ))
+    
+    df = pd.DataFrame.from_records(
+        records,
+        columns=["scale", "query_number", "config", "description", *QueryMetrics._fields],
+    )
+    df[METRICS] = df[METRICS].astype(float)
+    
+    # Pivot to one row per (scale, query) with a column per metric and configuration
+    full_index = pd.MultiIndex.from_product(
+        [scales, query_numbers], names=["scale", "query_number"]
+    )
+    wide = (
+        df.set_index(["scale", "query_number", "config"])[METRICS]
+        .unstack("config")
+        .reindex(index=full_index, columns=pd.MultiIndex.from_product([METRICS, INDEX_CONFIGS]))
+    )
+    
+    # Description from the first configuration (in INDEX_CONFIGS order) that has one
+    config_order = df["config"].map({config: i for i, config in enumerate(INDEX_CONFIGS)})
+    descriptions = (
+        df.assign(config_order=config_order)
+        .sort_values("config_order")
+        .groupby(["scale", "query_number"])["description"]
+        .first()
+    )
+    
+    summary = pd.DataFrame(index=full_index)
+    summary["description"] = descriptions.reindex(full_index).fillna("")
+    for index_config in INDEX_CONFIGS:
+        for metric in METRICS:
+            summary[f"{index_config}_{metric}_ms"] = wide[(metric, index_config)]
+    
+    # Speedups only for scales where both configurations were loaded,
+    # as vectorized column divisions (a zero with_index value yields no speedup)
+    comparable_scales = [
+        scale for scale in scales
+        if "no_index" in all_results[scale] and "with_index" in all_results[scale]
+    ]
+    comparable = wide.loc[comparable_scales]
+    for metric in METRICS:
+        summary[f"{metric}_speedup"] = (
+            comparable[(metric, "no_index")]
+            / comparable[(metric, "with_index")].replace(0, float("nan"))
+        ).reindex(full_index)
     
     # Write summary CSV
     output_file = RESULTS_DIR / "summary.csv"
@@ -219,24 +264,20 @@ def analyze_results():
         "mean_speedup",
     ]
     
-    with open(output_file, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for row in summary_rows:
-            # Format numeric values
-            formatted_row = {}
-            for key, value in row.items():
-                if value is None:
-                    formatted_row[key] = ""
-                elif isinstance(value, float):
-                    formatted_row[key] = f"{value:.2f}"
-                else:
-                    formatted_row[key] = value
-            writer.writerow(formatted_row)
+    # Missing values are written as empty cells, floats with two decimals.
+    # The CSV is rendered in memory, written in one call and renamed into
+    # place so readers never see a partially written summary.
+    csv_text = summary.reset_index()[fieldnames].to_csv(
+        index=False, float_format="%.2f", lineterminator="\r\n"
+    )
+    tmp_file = output_file.with_name(output_file.name + ".tmp")
+    tmp_file.write_bytes(csv_text.encode("utf-8"))
+    os.replace(tmp_file, output_file)
+    
+    save_manifest(manifest)
     
     print(f"Summary written to: {output_file}")
-    print(f"Total rows: {len(summary_rows)}")
+    print(f"Total rows: {len(summary)}")
     
     # Print summary statistics
     print()
@@ -244,41 +285,67 @@ def analyze_results():
     print("Summary Statistics:")
     print()
     
-    # Calculate average speedups per scale
-    for scale in SCALES:
-        scale_rows = [r for r in summary_rows if r["scale"] == scale]
-        if not scale_rows:
+    # Average speedups per scale in a single grouped pass (NaN speedups are skipped)
+    speedup_columns = [f"{metric}_speedup" for metric in METRICS]
+    grouped = summary[speedup_columns].groupby(level="scale", sort=False)
+    averages = grouped.mean()
+    counts = grouped.count()
+    
+    for scale in comparable_scales:
+        if scale not in counts.index or not counts.at[scale, "p50_speedup"]:
             continue
         
-        p50_speedups = [r["p50_speedup"] for r in scale_rows if r["p50_speedup"] is not None]
-        p95_speedups = [r["p95_speedup"] for r in scale_rows if r["p95_speedup"] is not None]
-        mean_speedups = [r["mean_speedup"] for r in scale_rows if r["mean_speedup"] is not None]
+        avg_p50 = averages.at[scale, "p50_speedup"]
+        avg_p95 = averages.at[scale, "p95_speedup"] if counts.at[scale, "p95_speedup"] else None
+        avg_mean = averages.at[scale, "mean_speedup"] if counts.at[scale, "mean_speedup"] else None
         
-        if p50_speedups:
-            avg_p50 = sum(p50_speedups) / len(p50_speedups)
-            avg_p95 = sum(p95_speedups) / len(p95_speedups) if p95_speedups else None
-            avg_mean = sum(mean_speedups) / len(mean_speedups) if mean_speedups else None
-            
-            print(f"{scale.upper()} scale:")
-            print(f"  Average p50 speedup: {avg_p50:.2f}x")
-            if avg_p95:
-                print(f"  Average p95 speedup: {avg_p95:.2f}x")
-            if avg_mean:
-                print(f"  Average mean speedup: {avg_mean:.2f}x")
-            print()
+        print(f"{scale.upper()} scale:")
+        print(f"  Average p50 speedup: {avg_p50:.2f}x")
+        if avg_p95:
+            print(f"  Average p95 speedup: {avg_p95:.2f}x")
+        if avg_mean:
+            print(f"  Average mean speedup: {avg_mean:.2f}x")
+        print()
     
     return True
 
 
-def main():
-    """Main function."""
+def main(argv=None):
+    """
+    Main function.
+    
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+    
+    Returns:
+        Process exit code
+    """
     parser = argparse.ArgumentParser(
         description="Analyze benchmark results and generate summary CSV"
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reanalyze even if results are unchanged since the last run"
+    )
+    
+    parser.add_argument(
+        "--scales",
+        nargs="+",
+        choices=SCALES,
+        help="Scales to analyze (default: all)"
+    )
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        choices=INDEX_CONFIGS,
+        help="Index configurations to load (default: all)"
+    )
+    
+    args = parser.parse_args(argv)
     
-    if analyze_results():
+    if analyze_results(force=args.force, scales=args.scales, configs=args.configs):
         return 0
     else:
         return 1
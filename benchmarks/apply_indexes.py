@@ -6,9 +6,11 @@ Applies or drops indexes to toggle between "no index" and "with index" configura
 
 import os
 import sys
+import queue
 import argparse
 import psycopg2
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # Default database configuration (can be overridden by environment variables)
 DEFAULT_CONFIG = {
@@ -22,6 +24,18 @@ DEFAULT_CONFIG = {
 # SQL directory
 SQL_DIR = Path(__file__).parent.parent / "sql"
 
+# Session settings for each index build connection. Builds run in parallel,
+# so total memory use is up to (number of connections x maintenance_work_mem).
+INDEX_BUILD_SETTINGS = {
+    "maintenance_work_mem": "512MB",
+    "max_parallel_maintenance_workers": "2",
+}
+
+# Default number of concurrent index build connections (--jobs). Kept small
+# because every connection may use maintenance_work_mem plus its parallel
+# maintenance workers on the database server, whatever the client's CPU count.
+DEFAULT_INDEX_JOBS = 2
+
 
 def get_db_connection():
     """Create and return a database connection."""
@@ -74,6 +88,84 @@ def execute_sql_file(conn, sql_file, action_name):
         return False
 
 
+def split_sql_statements(sql_content):
+    """
+    Split a SQL script into individual statements.
+    
+    Comment-only lines are dropped. Statements are split on ';', which is
+    sufficient for the DDL files in sql/ (no semicolons inside literals).
+    """
+    lines = [
+        line for line in sql_content.splitlines()
+        if not line.strip().startswith("--")
+    ]
+    statements = [stmt.strip() for stmt in "\n".join(lines).split(";")]
+    return [stmt for stmt in statements if stmt]
+
+
+def execute_statements_parallel(statements, action_name, jobs=DEFAULT_INDEX_JOBS):
+    """
+    Execute independent statements concurrently, one connection per worker.
+    
+    Args:
+        statements: List of SQL statements
+        action_name: Description of the action (for logging)
+        jobs: Maximum number of concurrent connections
+    
+    Returns:
+        True if every statement succeeded
+    """
+    num_workers = max(1, min(len(statements), jobs))
+    
+    print(f"{action_name} ({len(statements)} statements, {num_workers} connections)...")
+    
+    # Pool of connections tuned for index builds, handed out to worker threads.
+    # Every opened connection is tracked so all of them are closed, even if
+    # opening or configuring a later one fails.
+    opened = []
+    connections = queue.Queue()
+    
+    def run_statement(stmt):
+        conn = connections.get()
+        try:
+            cur = conn.cursor()
+            cur.execute(stmt)
+            conn.commit()
+            cur.close()
+            return True
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"Error {action_name.lower()}: {e}")
+            return False
+        finally:
+            connections.put(conn)
+    
+    try:
+        for _ in range(num_workers):
+            conn = get_db_connection()
+            opened.append(conn)
+            cur = conn.cursor()
+            for name, value in INDEX_BUILD_SETTINGS.items():
+                cur.execute(f"SET {name} = %s", (value,))
+            conn.commit()
+            cur.close()
+            connections.put(conn)
+        
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            results = list(executor.map(run_statement, statements))
+    except psycopg2.Error as e:
+        print(f"Error {action_name.lower()}: {e}")
+        return False
+    finally:
+        for conn in opened:
+            conn.close()
+    
+    if all(results):
+        print(f"{action_name} completed successfully")
+        return True
+    return False
+
+
 def list_indexes(conn):
     """List all indexes in the database."""
     try:
@@ -99,10 +191,27 @@ def list_indexes(conn):
         return []
 
 
-def apply_indexes(conn):
-    """Apply indexes from sql/indexes.sql."""
+def apply_indexes(jobs=DEFAULT_INDEX_JOBS):
+    """
+    Apply indexes from sql/indexes.sql.
+    
+    CREATE INDEX statements run on up to `jobs` dedicated connections so
+    independent indexes are built concurrently instead of one after
+    another on one backend.
+    
+    Args:
+        jobs: Maximum number of concurrent index build connections
+    """
     indexes_file = SQL_DIR / "indexes.sql"
-    return execute_sql_file(conn, indexes_file, "Applying indexes")
+    
+    if not indexes_file.exists():
+        print(f"Error: SQL file not found: {indexes_file}")
+        return False
+    
+    with open(indexes_file, "r", encoding="utf-8") as f:
+        statements = split_sql_statements(f.read())
+    
+    return execute_statements_parallel(statements, "Applying indexes", jobs)
 
 
 def drop_indexes(conn):
@@ -129,8 +238,16 @@ def show_status(conn):
             print(f"    - {index}")
 
 
-def main():
-    """Main function."""
+def main(argv=None):
+    """
+    Main function.
+    
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+    
+    Returns:
+        Process exit code
+    """
     parser = argparse.ArgumentParser(
         description="Manage database indexes for benchmarking"
     )
@@ -139,35 +256,46 @@ def main():
         choices=["apply", "drop", "status"],
         help="Action to perform: apply indexes, drop indexes, or show status"
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_INDEX_JOBS,
+        help="Concurrent index build connections for 'apply' "
+             f"(default: {DEFAULT_INDEX_JOBS}); each may use maintenance_work_mem "
+             f"({INDEX_BUILD_SETTINGS['maintenance_work_mem']}) on the server"
+    )
+    
+    args = parser.parse_args(argv)
     
-    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
     
     # Connect to database
     conn = get_db_connection()
     
     try:
         if args.action == "apply":
-            success = apply_indexes(conn)
+            success = apply_indexes(jobs=args.jobs)
             if success:
                 print()
                 show_status(conn)
-            sys.exit(0 if success else 1)
+            return 0 if success else 1
             
         elif args.action == "drop":
             success = drop_indexes(conn)
             if success:
                 print()
                 show_status(conn)
-            sys.exit(0 if success else 1)
+            return 0 if success else 1
             
         elif args.action == "status":
             show_status(conn)
-            sys.exit(0)
+            return 0
             
     finally:
         conn.close()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
@@ -8,11 +8,18 @@ import os
 import sys
 import json
 import re
+import queue
 import argparse
 from datetime import datetime
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
 
+try:
+    import orjson
+except ImportError:  # optional dependency, fall back to the stdlib serializer
+    orjson = None
+
 # Default database configuration (can be overridden by environment variables)
 DEFAULT_CONFIG = {
     "host": os.getenv("DB_HOST", "localhost"),
@@ -26,6 +33,23 @@ DEFAULT_CONFIG = {
 SQL_DIR = Path(__file__).parent.parent / "sql"
 RESULTS_DIR = Path(__file__).parent.parent / "results" / "metrics" / "plans"
 
+# Query blocks in queries.sql: "-- Query N: Description" followed by SQL
+_QUERY_RE = re.compile(r'-- Query (\d+):\s*([^\n]+)\n(.*?)(?=\n-- Query \d+:|$)', re.DOTALL)
+
+# Comment-only lines inside a query block
+_COMMENT_RE = re.compile(r'(?m)^\s*--.*$')
+
+# Write buffer size for plan files (1 MiB)
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Session settings for faster plan capture (--tune-session). These can change
+# the chosen plans, so they are opt-in and recorded in each plan's metadata.
+TUNED_SESSION_SETTINGS = {
+    "work_mem": "256MB",
+    "jit": "off",
+    "max_parallel_workers_per_gather": "4",
+}
+
 
 def get_db_connection():
     """Create and return a database connection."""
@@ -51,25 +75,13 @@ def parse_queries(queries_file):
     with open(queries_file, "r", encoding="utf-8") as f:
         content = f.read()
     
-    # Pattern to match query blocks: "-- Query N: Description" followed by SQL
-    pattern = r'-- Query (\d+):\s*([^\n]+)\n(.*?)(?=\n-- Query \d+:|$)'
-    matches = re.finditer(pattern, content, re.DOTALL)
-    
     queries = []
-    for match in matches:
+    for match in _QUERY_RE.finditer(content):
         query_num = int(match.group(1))
         description = match.group(2).strip()
-        sql = match.group(3).strip()
-        
-        # Clean up SQL: remove leading/trailing whitespace and comments
-        sql_lines = []
-        for line in sql.split('\n'):
-            line = line.strip()
-            # Skip empty lines and comment-only lines
-            if line and not line.startswith('--'):
-                sql_lines.append(line)
         
-        sql_query = ' '.join(sql_lines)
+        # Drop comment-only lines, then collapse all whitespace in one pass
+        sql_query = " ".join(_COMMENT_RE.sub("", match.group(3)).split())
         # Remove trailing semicolon if present
         if sql_query.endswith(';'):
             sql_query = sql_query[:-1]
@@ -80,18 +92,50 @@ def parse_queries(queries_file):
     return queries
 
 
-def execute_explain(conn, query, query_num, description):
+def configure_session(conn, tune_session=False):
+    """
+    Apply session settings before capturing plans.
+    
+    track_io_timing is always requested so BUFFERS output includes I/O
+    timings; it needs superuser rights and is skipped if not permitted.
+    
+    Args:
+        conn: Database connection
+        tune_session: Also apply TUNED_SESSION_SETTINGS
+    
+    Returns:
+        Dictionary of settings that were applied
+    """
+    settings = {"track_io_timing": "on"}
+    if tune_session:
+        settings.update(TUNED_SESSION_SETTINGS)
+    
+    applied = {}
+    cur = conn.cursor()
+    for name, value in settings.items():
+        try:
+            cur.execute(f"SET {name} = %s", (value,))
+            conn.commit()
+            applied[name] = value
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"Warning: could not set {name}: {str(e).strip()}")
+    cur.close()
+    
+    return applied
+
+
+def execute_explain(cur, query, query_num, description):
     """
     Execute EXPLAIN ANALYZE BUFFERS FORMAT JSON for a query.
+    Uses the caller's cursor so one cursor serves every query.
     Returns the JSON plan or None if error.
     """
     explain_query = f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}"
     
     try:
-        cur = conn.cursor()
         cur.execute(explain_query)
         result = cur.fetchone()
-        cur.close()
         
         if result and result[0]:
             # result[0] is a list containing the plan JSON
@@ -103,25 +147,30 @@ def execute_explain(conn, query, query_num, description):
             
     except psycopg2.Error as e:
         print(f"  Error executing Query {query_num}: {e}")
+        # Clear the aborted transaction so the shared cursor stays usable
+        cur.connection.rollback()
         return None
     except Exception as e:
         print(f"  Unexpected error for Query {query_num}: {e}")
         return None
 
 
-def save_plan(plan_data, output_dir, query_num, description, index_config):
+def build_plan_record(plan_data, output_dir, query_num, description, index_config,
+                      session_settings=None):
     """
-    Save execution plan to JSON file.
+    Build the output path and JSON document for an execution plan.
     
     Args:
         plan_data: The JSON plan data
-        output_dir: Directory to save the plan
+        output_dir: Directory the plan will be saved to
         query_num: Query number
         description: Query description
         index_config: Index configuration name (e.g., "no_index", "with_index")
-    """
-    output_dir.mkdir(parents=True, exist_ok=True)
+        session_settings: Session settings the plan was captured with
     
+    Returns:
+        Tuple of (filepath, output_data)
+    """
     # Create filename: query_01_no_index.json
     filename = f"query_{query_num:02d}_{index_config}.json"
     filepath = output_dir / filename
@@ -135,23 +184,52 @@ def save_plan(plan_data, output_dir, query_num, description, index_config):
             "captured_at": datetime.now().isoformat(),
             "database": DEFAULT_CONFIG["database"],
             "host": DEFAULT_CONFIG["host"],
+            "session_settings": session_settings or {},
         },
         "plan": plan_data
     }
     
-    # Save to JSON file
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    return filepath, output_data
+
+
+def save_plans(plan_records, output_dir, pretty=False):
+    """
+    Save all captured execution plans to JSON files in a single pass.
+    
+    Args:
+        plan_records: List of (filepath, output_data) tuples
+        output_dir: Directory to save the plans
+        pretty: Indent the JSON for human reading (compact otherwise)
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    if orjson is not None:
+        # orjson writes UTF-8 bytes directly, compact unless pretty is requested
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        for filepath, output_data in plan_records:
+            with open(filepath, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(orjson.dumps(output_data, option=option))
+        return
+    
+    if pretty:
+        dump_kwargs = {"indent": 2}
+    else:
+        dump_kwargs = {"separators": (",", ":")}
     
-    return filepath
+    for filepath, output_data in plan_records:
+        with open(filepath, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+            json.dump(output_data, f, ensure_ascii=False, **dump_kwargs)
 
 
-def capture_plans(index_config="no_index"):
+def capture_plans(index_config="no_index", pretty=False, tune_session=False, jobs=1):
     """
     Capture execution plans for all queries.
     
     Args:
         index_config: Configuration name (e.g., "no_index", "with_index")
+        pretty: Indent the saved plan JSON for human reading
+        tune_session: Apply TUNED_SESSION_SETTINGS before capturing
+        jobs: Number of connections used to run EXPLAIN concurrently
     """
     queries_file = SQL_DIR / "queries.sql"
     output_dir = RESULTS_DIR / index_config
@@ -166,22 +244,51 @@ def capture_plans(index_config="no_index"):
     print(f"Found {len(queries)} queries to analyze")
     print()
     
-    # Connect to database
-    conn = get_db_connection()
+    # Connect to database, one reusable cursor per connection in the pool
+    num_jobs = max(1, min(jobs, len(queries)))
+    connections = queue.Queue()
+    for _ in range(num_jobs):
+        conn = get_db_connection()
+        session_settings = configure_session(conn, tune_session=tune_session)
+        connections.put((conn, conn.cursor()))
+    
+    def explain_query(query):
+        query_num, description, sql_query = query
+        conn, cur = connections.get()
+        try:
+            return execute_explain(cur, sql_query, query_num, description)
+        finally:
+            connections.put((conn, cur))
     
+    executor = None
     try:
+        if num_jobs > 1:
+            # Queries are independent, results come back in query order
+            print(f"Running EXPLAIN on {num_jobs} connections")
+            print()
+            executor = ThreadPoolExecutor(max_workers=num_jobs)
+            plans = executor.map(explain_query, queries)
+        else:
+            plans = map(explain_query, queries)
+        
         success_count = 0
         error_count = 0
+        plan_records = []
         
         for query_num, description, sql_query in queries:
             print(f"Query {query_num}: {description}")
             
-            # Execute EXPLAIN
-            plan = execute_explain(conn, sql_query, query_num, description)
+            # Execute EXPLAIN (or wait for the pooled result)
+            plan = next(plans)
             
             if plan:
-                # Save plan
-                filepath = save_plan(plan, output_dir, query_num, description, index_config)
+                # Keep the plan in memory, all plans are written once at the end
+                plan_records.append(
+                    build_plan_record(
+                        plan, output_dir, query_num, description, index_config,
+                        session_settings=session_settings
+                    )
+                )
                 
                 # Extract execution time if available
                 exec_time = None
@@ -194,13 +301,14 @@ def capture_plans(index_config="no_index"):
                 
                 if exec_time:
                     print(f"  Execution time: {exec_time:.2f} ms")
-                print(f"  Saved to: {filepath}")
                 success_count += 1
             else:
                 error_count += 1
             
             print()
         
+        save_plans(plan_records, output_dir, pretty=pretty)
+        
         # Summary
         print("=" * 60)
         print(f"Summary:")
@@ -212,11 +320,24 @@ def capture_plans(index_config="no_index"):
         return success_count == len(queries)
         
     finally:
-        conn.close()
+        if executor is not None:
+            executor.shutdown(wait=True)
+        while not connections.empty():
+            conn, cur = connections.get()
+            cur.close()
+            conn.close()
 
 
-def main():
-    """Main function."""
+def main(argv=None):
+    """
+    Main function.
+    
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+    
+    Returns:
+        Process exit code
+    """
     parser = argparse.ArgumentParser(
         description="Capture EXPLAIN ANALYZE plans for all queries"
     )
@@ -226,15 +347,38 @@ def main():
         default="no_index",
         help="Index configuration name (default: no_index). Use 'with_index' after applying indexes."
     )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent the saved plan JSON for human reading (default: compact)"
+    )
+    parser.add_argument(
+        "--tune-session",
+        action="store_true",
+        help="Raise work_mem and disable JIT for faster capture (may change plans)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of concurrent connections used for EXPLAIN (default: 1). Concurrent "
+             "EXPLAIN ANALYZE runs compete for the server, so their timings are not "
+             "comparable with --jobs 1"
+    )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
-    if capture_plans(index_config=args.index_config):
-        sys.exit(0)
+    if capture_plans(
+        index_config=args.index_config,
+        pretty=args.pretty,
+        tune_session=args.tune_session,
+        jobs=args.jobs,
+    ):
+        return 0
     else:
-        sys.exit(1)
+        return 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
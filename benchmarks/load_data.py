@@ -6,9 +6,12 @@ Loads CSV data into PostgreSQL using COPY for efficient ingestion.
 
 import os
 import sys
+import shutil
 import argparse
+import subprocess
 import psycopg2
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from psycopg2.extras import execute_values
 
 # Default database configuration (can be overridden by environment variables)
@@ -20,8 +23,15 @@ DEFAULT_CONFIG = {
     "password": os.getenv("DB_PASSWORD", "benchmark"),
 }
 
-# Data directory
-DATA_DIR = Path(__file__).parent.parent / "data" / "raw"
+# Data directory (--data-dir overrides it for a run)
+DEFAULT_DATA_DIR = Path(__file__).parent.parent / "data" / "raw"
+DATA_DIR = DEFAULT_DATA_DIR
+
+# Read buffer and COPY chunk size (1 MiB)
+COPY_BUFFER_SIZE = 1 << 20
+
+# With --use-psql, CSV files at least this large are loaded by psql (4 MiB)
+PSQL_COPY_MIN_BYTES = 4 << 20
 
 
 def get_db_connection():
@@ -36,7 +46,61 @@ def get_db_connection():
         sys.exit(1)
 
 
-def load_table_copy(conn, table_name, csv_file, columns):
+def copy_with_psql(conn, table_name, csv_path, column_list):
+    """
+    Load a CSV file with psql's \\copy so the data never passes through Python.
+    
+    The psql session mirrors the bulk load settings of the given connection.
+    
+    Args:
+        conn: Database connection prepared with prepare_bulk_load()
+        table_name: Target table name
+        csv_path: Path to CSV file
+        column_list: Comma-separated column names
+    
+    Returns:
+        Number of rows copied, as reported by psql
+    """
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT current_setting('synchronous_commit'), "
+        "current_setting('session_replication_role')"
+    )
+    synchronous_commit, replication_role = cur.fetchone()
+    cur.close()
+    
+    quoted_path = str(csv_path).replace("'", "''")
+    copy_cmd = f"\\copy {table_name} ({column_list}) FROM '{quoted_path}' WITH CSV HEADER"
+    
+    env = dict(os.environ)
+    env["PGPASSWORD"] = DEFAULT_CONFIG["password"]
+    # session_replication_role is superuser-only: only forward it when
+    # prepare_bulk_load() managed to set it, or psql fails to connect
+    options = [f"-c synchronous_commit={synchronous_commit}"]
+    if replication_role == "replica":
+        options.append(f"-c session_replication_role={replication_role}")
+    env["PGOPTIONS"] = " ".join(options)
+    
+    result = subprocess.run(
+        ["psql", "-X", "-v", "ON_ERROR_STOP=1",
+         "-h", DEFAULT_CONFIG["host"],
+         "-p", str(DEFAULT_CONFIG["port"]),
+         "-U", DEFAULT_CONFIG["user"],
+         "-d", DEFAULT_CONFIG["database"],
+         "-c", copy_cmd],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    
+    # psql reports "COPY <rows>" for a successful \\copy
+    return int(result.stdout.split()[-1])
+
+
+def load_table_copy(conn, table_name, csv_file, columns, use_psql=False, freeze=False):
     """
     Load data from CSV file into table using COPY FROM STDIN.
     
@@ -44,7 +108,11 @@ def load_table_copy(conn, table_name, csv_file, columns):
         conn: Database connection
         table_name: Target table name
         csv_file: Path to CSV file
-        columns: List of column names to load (excluding auto-generated IDs)
+        columns: List of column names to load, in CSV column order
+        use_psql: Load files of at least PSQL_COPY_MIN_BYTES through psql's \\copy
+        freeze: Load with COPY ... FREEZE. The table must have been created in
+            the connection's open transaction, which is left for the caller
+            to commit or roll back.
     """
     csv_path = DATA_DIR / csv_file
     
@@ -55,82 +123,171 @@ def load_table_copy(conn, table_name, csv_file, columns):
     try:
         cur = conn.cursor()
         
-        # Build COPY command - exclude auto-generated ID columns
+        # Build COPY command - IDs come from the generated CSV so foreign keys line up
         column_list = ", ".join(columns)
-        copy_sql = f"COPY {table_name} ({column_list}) FROM STDIN WITH CSV HEADER"
+        if freeze:
+            copy_sql = (f"COPY {table_name} ({column_list}) FROM STDIN "
+                        "WITH (FORMAT CSV, HEADER, FREEZE)")
+        else:
+            copy_sql = f"COPY {table_name} ({column_list}) FROM STDIN WITH CSV HEADER"
         
         print(f"Loading {table_name} from {csv_file}...")
         
-        with open(csv_path, "r", encoding="utf-8") as f:
-            cur.copy_expert(copy_sql, f)
-        
-        cur.execute(f"SELECT COUNT(*) FROM {table_name}")
-        count = cur.fetchone()[0]
+        if use_psql and not freeze and csv_path.stat().st_size >= PSQL_COPY_MIN_BYTES:
+            count = copy_with_psql(conn, table_name, csv_path, column_list)
+        else:
+            # Stream raw bytes in large chunks instead of decoding line-sized reads
+            with open(csv_path, "rb", buffering=COPY_BUFFER_SIZE) as f:
+                cur.copy_expert(copy_sql, f, size=COPY_BUFFER_SIZE)
+            # COPY reports the number of loaded rows, no need to scan the table
+            count = cur.rowcount
         
-        conn.commit()
+        if not freeze:
+            conn.commit()
         cur.close()
         
         print(f"  Loaded {count} records into {table_name}")
         return True
         
     except Exception as e:
-        conn.rollback()
+        if not freeze:
+            conn.rollback()
         print(f"  Error loading {table_name}: {e}")
         return False
 
 
-def load_categories(conn):
+def prepare_bulk_load(conn):
+    """
+    Tune the session for bulk COPY ingestion.
+    
+    The schema is recreated right before loading, so no secondary indexes
+    exist yet and the load only pays for primary keys and foreign keys.
+    
+    Args:
+        conn: Database connection
+    
+    Returns:
+        True if per-row foreign key checks are skipped for this session
+    """
+    cur = conn.cursor()
+    
+    # Loaded data can be regenerated, so don't wait for WAL flushes on commit
+    cur.execute("SET synchronous_commit TO off")
+    
+    # Skip the per-row foreign key triggers (generated data is consistent).
+    # This needs superuser rights, so keep going with FK checks otherwise.
+    cur.execute("SAVEPOINT bulk_load")
+    try:
+        cur.execute("SET session_replication_role = replica")
+        fk_checks_skipped = True
+    except psycopg2.Error:
+        cur.execute("ROLLBACK TO SAVEPOINT bulk_load")
+        fk_checks_skipped = False
+    
+    conn.commit()
+    cur.close()
+    
+    return fk_checks_skipped
+
+
+def load_categories(conn, use_psql=False, freeze=False):
     """Load categories table."""
     return load_table_copy(
         conn,
         "categories",
         "categories.csv",
-        ["name", "description", "created_at"]
+        ["category_id", "name", "description", "created_at"],
+        use_psql=use_psql,
+        freeze=freeze
     )
 
 
-def load_products(conn):
+def load_products(conn, use_psql=False, freeze=False):
     """Load products table."""
     return load_table_copy(
         conn,
         "products",
         "products.csv",
-        ["category_id", "name", "description", "price", "stock_quantity", "created_at"]
+        ["product_id", "category_id", "name", "description", "price", "stock_quantity",
+         "created_at"],
+        use_psql=use_psql,
+        freeze=freeze
     )
 
 
-def load_customers(conn):
+def load_customers(conn, use_psql=False, freeze=False):
     """Load customers table."""
     return load_table_copy(
         conn,
         "customers",
         "customers.csv",
-        ["email", "first_name", "last_name", "country", "city", "created_at"]
+        ["customer_id", "email", "first_name", "last_name", "country", "city", "created_at"],
+        use_psql=use_psql,
+        freeze=freeze
     )
 
 
-def load_orders(conn):
+def load_orders(conn, use_psql=False, freeze=False):
     """Load orders table."""
     return load_table_copy(
         conn,
         "orders",
         "orders.csv",
-        ["customer_id", "order_date", "total_amount", "status", "shipping_country"]
+        ["order_id", "customer_id", "order_date", "total_amount", "status", "shipping_country"],
+        use_psql=use_psql,
+        freeze=freeze
     )
 
 
-def load_order_items(conn):
+def load_order_items(conn, use_psql=False, freeze=False):
     """Load order_items table."""
     return load_table_copy(
         conn,
         "order_items",
         "order_items.csv",
-        ["order_id", "product_id", "quantity", "unit_price", "subtotal"]
+        ["order_item_id", "order_id", "product_id", "quantity", "unit_price", "subtotal"],
+        use_psql=use_psql,
+        freeze=freeze
     )
 
 
-def apply_schema(conn):
-    """Apply the database schema."""
+# Tables grouped into load waves. Tables within a wave have no foreign key
+# dependency on each other and are loaded concurrently.
+LOAD_WAVES = [
+    [load_categories, load_customers],
+    [load_products, load_orders],
+    [load_order_items],
+]
+
+
+def load_in_new_connection(loader, use_psql=False):
+    """
+    Run a table loader on its own connection so COPYs can run in parallel.
+    
+    Args:
+        loader: One of the load_* functions
+        use_psql: Passed through to the loader
+    
+    Returns:
+        The loader's success flag
+    """
+    conn = get_db_connection()
+    try:
+        prepare_bulk_load(conn)
+        return loader(conn, use_psql=use_psql)
+    finally:
+        conn.close()
+
+
+def apply_schema(conn, commit=True):
+    """
+    Apply the database schema.
+    
+    Args:
+        conn: Database connection
+        commit: Commit the schema change (False keeps the transaction open
+            so tables can be loaded with COPY FREEZE)
+    """
     schema_path = Path(__file__).parent.parent / "sql" / "schema.sql"
     
     if not schema_path.exists():
@@ -141,11 +298,11 @@ def apply_schema(conn):
         cur = conn.cursor()
         
         print("Applying database schema...")
-        with open(schema_path, "r", encoding="utf-8") as f:
-            schema_sql = f.read()
+        schema_sql = schema_path.read_bytes().decode("utf-8")
         
         cur.execute(schema_sql)
-        conn.commit()
+        if commit:
+            conn.commit()
         cur.close()
         
         print("Schema applied successfully")
@@ -157,58 +314,111 @@ def apply_schema(conn):
         return False
 
 
-def load_data(scale="small"):
+def load_frozen(conn):
+    """
+    Apply the schema and load every table with COPY FREEZE in one transaction.
+    
+    FREEZE only applies to tables created in the loading transaction, so
+    this runs serially on a single connection and commits once at the end.
+    Loaded rows are written already frozen, so no later VACUUM FREEZE pass
+    has to rewrite them.
+    
+    Args:
+        conn: Database connection prepared with prepare_bulk_load()
+    
+    Returns:
+        True if the schema and all tables were loaded
+    """
+    if not apply_schema(conn, commit=False):
+        return False
+    
+    print()
+    
+    for wave in LOAD_WAVES:
+        for loader in wave:
+            if not loader(conn, freeze=True):
+                conn.rollback()
+                return False
+    
+    conn.commit()
+    return True
+
+
+def load_data(scale="small", use_psql=False, freeze=False):
     """
     Load data into PostgreSQL database.
     
     Args:
         scale: Dataset scale ('small', 'medium', 'large')
+        use_psql: Load large CSV files through psql's \\copy
+        freeze: Load all tables with COPY FREEZE in the schema's transaction
     """
     print(f"Loading {scale} dataset into PostgreSQL...")
     print(f"Database: {DEFAULT_CONFIG['database']} @ {DEFAULT_CONFIG['host']}:{DEFAULT_CONFIG['port']}")
+    print(f"Data directory: {DATA_DIR}")
     print()
     
+    if freeze and use_psql:
+        print("Warning: --freeze loads in a single transaction, ignoring --use-psql")
+        use_psql = False
+    
+    if use_psql and shutil.which("psql") is None:
+        print("Warning: psql not found in PATH, loading all tables through psycopg2")
+        use_psql = False
+    
     # Connect to database
     conn = get_db_connection()
     
     try:
-        # Apply schema first
-        if not apply_schema(conn):
-            return False
-        
-        print()
-        
-        # Load data in dependency order
-        success = True
-        
-        if not load_categories(conn):
-            success = False
-        
-        if not load_products(conn):
-            success = False
-        
-        if not load_customers(conn):
-            success = False
-        
-        if not load_orders(conn):
-            success = False
-        
-        if not load_order_items(conn):
-            success = False
+        if freeze:
+            if not prepare_bulk_load(conn):
+                print("Note: foreign key checks stay enabled during load (requires superuser)")
+            
+            success = load_frozen(conn)
+        else:
+            # Apply schema first
+            if not apply_schema(conn):
+                return False
+            
+            if not prepare_bulk_load(conn):
+                print("Note: foreign key checks stay enabled during load (requires superuser)")
+            
+            print()
+            
+            # Load data wave by wave, one connection per table within a wave
+            success = True
+            
+            max_workers = max(len(wave) for wave in LOAD_WAVES)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for wave in LOAD_WAVES:
+                    # Wait for the whole wave before starting tables that depend on it
+                    results = list(executor.map(
+                        lambda loader: load_in_new_connection(loader, use_psql=use_psql), wave
+                    ))
+                    if not all(results):
+                        success = False
         
         if success:
             print()
             print("Data loading complete!")
             
-            # Display summary
-            cur = conn.cursor()
+            # Refresh planner statistics once and report row counts from the
+            # catalog instead of scanning every table with COUNT(*)
             tables = ["categories", "products", "customers", "orders", "order_items"]
-            print("\nSummary:")
-            for table in tables:
-                cur.execute(f"SELECT COUNT(*) FROM {table}")
-                count = cur.fetchone()[0]
-                print(f"  {table}: {count} records")
+            cur = conn.cursor()
+            cur.execute(f"ANALYZE {', '.join(tables)}")
+            cur.execute(
+                "SELECT relname, reltuples::bigint FROM pg_class "
+                "WHERE relname = ANY(%s) AND relkind = 'r'",
+                (tables,)
+            )
+            row_counts = dict(cur.fetchall())
+            conn.commit()
             cur.close()
+            
+            print("\nSummary (row counts from ANALYZE, estimated for large tables):")
+            for table in tables:
+                print(f"  {table}: {row_counts.get(table, 0)} records")
         else:
             print("\nData loading completed with errors")
             return False
@@ -219,8 +429,18 @@ def load_data(scale="small"):
         conn.close()
 
 
-def main():
-    """Main function."""
+def main(argv=None):
+    """
+    Main function.
+    
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+    
+    Returns:
+        Process exit code
+    """
+    global DATA_DIR
+    
     parser = argparse.ArgumentParser(
         description="Load CSV data into PostgreSQL database"
     )
@@ -231,15 +451,33 @@ def main():
         choices=["small", "medium", "large"],
         help="Dataset scale to load (default: small)"
     )
+    parser.add_argument(
+        "--use-psql",
+        action="store_true",
+        help="Load large CSV files with psql's \\copy instead of streaming them through Python"
+    )
+    parser.add_argument(
+        "--freeze",
+        action="store_true",
+        help="Load all tables with COPY FREEZE in one transaction (serial, no later freeze vacuum)"
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        default=str(DEFAULT_DATA_DIR),
+        help="Directory containing the generated CSV files (default: data/raw)"
+    )
+    
+    args = parser.parse_args(argv)
     
-    args = parser.parse_args()
+    DATA_DIR = Path(args.data_dir)
     
-    if load_data(scale=args.scale):
-        sys.exit(0)
+    if load_data(scale=args.scale, use_psql=args.use_psql, freeze=args.freeze):
+        return 0
     else:
-        sys.exit(1)
+        return 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
@@ -6,14 +6,23 @@ Generates simple graphs to visualize benchmark results.
 
 import json
 import argparse
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-import matplotlib.pyplot as plt
-import matplotlib
+from typing import Dict, List, Any, Iterable, Optional
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
 
-# Use non-interactive backend
-matplotlib.use('Agg')
+try:
+    import orjson
+except ImportError:  # optional dependency, fall back to the stdlib parser
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional dependency, fall back to a full parse
+    ijson = None
 
 # Directories
 RESULTS_DIR = Path(__file__).parent.parent / "results" / "metrics"
@@ -23,82 +32,265 @@ FIGURES_DIR = Path(__file__).parent.parent / "results" / "figures"
 SCALES = ["small", "medium", "large"]
 SCALE_ORDER = {"small": 0, "medium": 1, "large": 2}
 
+# Output resolution (--fast uses the lower DPI for quick iterations)
+DEFAULT_DPI = 150
+FAST_DPI = 100
+
+# PNG encoder settings: light zlib compression encodes several times faster
+# than the default level for a modest increase in file size
+PNG_PIL_KWARGS = {"compress_level": 1, "optimize": False}
+
 
+@lru_cache(maxsize=None)
 def load_latency_results(scale: str, index_config: str) -> Optional[Dict[str, Any]]:
-    """Load latency benchmark results from JSON file."""
+    """
+    Load latency benchmark results from JSON file.
+    
+    Results are cached because several plots read the same files;
+    callers must not modify the returned dictionary.
+    """
     filename = f"latency_{index_config}_{scale}.json"
     filepath = RESULTS_DIR / filename
     
-    if not filepath.exists():
-        return None
-    
+    # A missing file is detected by open() itself, no separate exists() check
     try:
+        if orjson is not None:
+            # orjson parses bytes directly, so skip the text-mode decode
+            with open(filepath, "rb") as f:
+                return orjson.loads(f.read())
         with open(filepath, "r", encoding="utf-8") as f:
             return json.load(f)
+    except FileNotFoundError:
+        return None
     except Exception as e:
         print(f"Error loading {filepath}: {e}")
         return None
 
 
+@lru_cache(maxsize=None)
 def load_throughput_results(scale: str, index_config: str) -> Optional[Dict[str, Any]]:
-    """Load throughput benchmark results from JSON file."""
+    """
+    Load throughput benchmark results from JSON file.
+    
+    Cached like load_latency_results; callers must not modify the result.
+    """
     filename = f"throughput_{index_config}_{scale}.json"
     filepath = RESULTS_DIR / filename
     
-    if not filepath.exists():
-        return None
-    
+    # A missing file is detected by open() itself, no separate exists() check
     try:
+        if orjson is not None:
+            # orjson parses bytes directly, so skip the text-mode decode
+            with open(filepath, "rb") as f:
+                return orjson.loads(f.read())
         with open(filepath, "r", encoding="utf-8") as f:
             return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error loading {filepath}: {e}")
+        return None
+
+
+def load_throughput_metadata(scale: str, index_config: str,
+                             keys=("concurrency", "total_qps")) -> Optional[Dict[str, Any]]:
+    """
+    Load selected metadata fields of a throughput results file.
+    
+    With ijson the "metadata" object (written before the per-query results)
+    is streamed and parsing stops once all keys are found, so the query
+    statistics are never parsed. Otherwise the whole file is loaded.
+    
+    Args:
+        scale: Dataset scale (small, medium, large)
+        index_config: Index configuration (no_index, with_index)
+        keys: Metadata fields to return
+    
+    Returns:
+        Dictionary with the fields that were found, or None if the file
+        doesn't exist or can't be parsed
+    """
+    if ijson is None:
+        results = load_throughput_results(scale, index_config)
+        if not results:
+            return None
+        metadata = results.get("metadata", {})
+        return {key: metadata[key] for key in keys if key in metadata}
+    
+    filepath = RESULTS_DIR / f"throughput_{index_config}_{scale}.json"
+    
+    metadata = {}
+    try:
+        with open(filepath, "rb") as f:
+            for key, value in ijson.kvitems(f, "metadata", use_float=True):
+                if key in keys:
+                    metadata[key] = value
+                    if len(metadata) == len(keys):
+                        break
+    except FileNotFoundError:
+        return None
     except Exception as e:
         print(f"Error loading {filepath}: {e}")
         return None
+    
+    return metadata
+
+
+def _render_options(dpi: int) -> Dict[str, Any]:
+    """Return the savefig() options a figure is rendered with."""
+    return {"dpi": dpi, "bbox_inches": "tight", "pil_kwargs": PNG_PIL_KWARGS}
+
+
+def _stamp_path(output: Path) -> Path:
+    """Return the sidecar file recording the render options of a figure."""
+    return output.with_name(output.name + ".stamp.json")
+
+
+def _needs_rebuild(output: Path, inputs: Iterable[Path], dpi: int) -> bool:
+    """
+    Check whether a figure is older than any of its input files or was
+    rendered with different options (e.g. a --fast DPI).
+    
+    Args:
+        output: Figure file
+        inputs: Results files the figure is built from
+        dpi: Resolution the figure is requested at
+    
+    Returns:
+        True if the figure is missing, an input was modified after it, or
+        its stamp does not match the requested render options
+    """
+    try:
+        output_mtime = output.stat().st_mtime_ns
+        with open(_stamp_path(output), "r", encoding="utf-8") as f:
+            stamp = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return True
+    
+    if stamp != _render_options(dpi):
+        return True
+    
+    input_mtimes = [path.stat().st_mtime_ns for path in inputs]
+    return not input_mtimes or max(input_mtimes) > output_mtime
+
+
+def _save_figure(fig, output: Path, dpi: int):
+    """
+    Save a figure and stamp it with its render options for _needs_rebuild().
+    
+    Args:
+        fig: Figure to save
+        output: Figure file
+        dpi: Output resolution
+    """
+    options = _render_options(dpi)
+    
+    output.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(output, **options)
+    with open(_stamp_path(output), "w", encoding="utf-8") as f:
+        json.dump(options, f)
+
+
+# Figure shared by all plots in this process, created on first use
+_FIGURE = None
+
+
+def _get_axes(figsize):
+    """
+    Clear the shared figure, resize it and return a fresh set of axes.
+    
+    Reusing one Figure avoids setting up a new figure and Agg canvas for
+    every graph. The figure is attached to an Agg canvas directly, without
+    pyplot's global figure manager.
+    """
+    global _FIGURE
+    if _FIGURE is None:
+        _FIGURE = Figure(figsize=figsize)
+        FigureCanvasAgg(_FIGURE)
+    else:
+        _FIGURE.clear()
+        _FIGURE.set_size_inches(*figsize)
+    return _FIGURE, _FIGURE.add_subplot(111)
 
 
-def plot_latency_vs_scale():
+def _p50_by_query(results: Dict[str, Any]):
+    """
+    Return query numbers and their p50 latencies as arrays sorted by query number.
+    
+    Missing p50 values are NaN.
+    """
+    queries = results.get("queries", [])
+    query_numbers = np.fromiter(
+        (query_result.get("query_number") for query_result in queries),
+        dtype=np.int64, count=len(queries)
+    )
+    p50_values = np.fromiter(
+        (query_result.get("statistics", {}).get("p50") for query_result in queries),
+        dtype=np.float64, count=len(queries)
+    )
+    order = np.argsort(query_numbers, kind="stable")
+    return query_numbers[order], p50_values[order]
+
+
+@lru_cache(maxsize=None)
+def load_p50_by_query(scale: str, index_config: str):
+    """
+    Load latency results as sorted (query_numbers, p50) arrays.
+    
+    Cached so the arrays are built once per file; they are read-only.
+    
+    Returns:
+        Tuple of arrays from _p50_by_query(), or None if results are missing
+    """
+    results = load_latency_results(scale, index_config)
+    if not results:
+        return None
+    
+    query_numbers, p50_values = _p50_by_query(results)
+    query_numbers.flags.writeable = False
+    p50_values.flags.writeable = False
+    return query_numbers, p50_values
+
+
+def plot_latency_vs_scale(dpi: int = DEFAULT_DPI, force: bool = False):
     """Plot latency (p50) vs scale for both index configurations."""
     print("Generating latency vs scale graph...")
     
+    output_file = FIGURES_DIR / "latency_vs_scale.png"
+    if not force and not _needs_rebuild(output_file, RESULTS_DIR.glob("latency_*_*.json"), dpi):
+        print(f"  Up to date: {output_file}")
+        return True
+    
     scales_data = []
     no_index_p50 = []
     with_index_p50 = []
     
     for scale in SCALES:
-        no_index_results = load_latency_results(scale, "no_index")
-        with_index_results = load_latency_results(scale, "with_index")
+        no_index_arrays = load_p50_by_query(scale, "no_index")
+        with_index_arrays = load_p50_by_query(scale, "with_index")
         
-        if no_index_results and with_index_results:
-            # Calculate average p50 across all queries
-            no_index_values = []
-            with_index_values = []
-            
-            for query_result in no_index_results.get("queries", []):
-                p50 = query_result.get("statistics", {}).get("p50")
-                if p50 is not None:
-                    no_index_values.append(p50)
+        if no_index_arrays and with_index_arrays:
+            # Calculate average p50 across all queries that have one
+            no_index_values = no_index_arrays[1][np.isfinite(no_index_arrays[1])]
+            with_index_values = with_index_arrays[1][np.isfinite(with_index_arrays[1])]
             
-            for query_result in with_index_results.get("queries", []):
-                p50 = query_result.get("statistics", {}).get("p50")
-                if p50 is not None:
-                    with_index_values.append(p50)
-            
-            if no_index_values and with_index_values:
+            if no_index_values.size and with_index_values.size:
                 scales_data.append(scale)
-                no_index_p50.append(np.mean(no_index_values))
-                with_index_p50.append(np.mean(with_index_values))
+                no_index_p50.append(no_index_values.mean())
+                with_index_p50.append(with_index_values.mean())
     
     if not scales_data:
         print("  No data available for latency vs scale")
         return False
     
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = _get_axes((10, 6))
     
     x = np.arange(len(scales_data))
     width = 0.35
     
-    bars1 = ax.bar(x - width/2, no_index_p50, width, label='No Index', color='#d62728', alpha=0.8)
-    bars2 = ax.bar(x + width/2, with_index_p50, width, label='With Index', color='#2ca02c', alpha=0.8)
+    # Opaque colors matching the previous 80% alpha over white
+    bars1 = ax.bar(x - width/2, no_index_p50, width, label='No Index', color='#de5253')
+    bars2 = ax.bar(x + width/2, with_index_p50, width, label='With Index', color='#56b356')
     
     ax.set_xlabel('Dataset Scale', fontsize=12)
     ax.set_ylabel('Average Latency (ms, p50)', fontsize=12)
@@ -108,52 +300,48 @@ def plot_latency_vs_scale():
     ax.legend()
     ax.grid(True, alpha=0.3, axis='y')
     
-    # Add value labels on bars
+    # Add value labels on bars, one call per bar container
     for bars in [bars1, bars2]:
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                   f'{height:.1f}',
-                   ha='center', va='bottom', fontsize=9)
+        ax.bar_label(bars, fmt='%.1f', fontsize=9)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
-    output_file = FIGURES_DIR / "latency_vs_scale.png"
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_file, dpi=150, bbox_inches='tight')
-    plt.close()
+    _save_figure(fig, output_file, dpi)
     
     print(f"  Saved to: {output_file}")
     return True
 
 
-def plot_speedup_per_query():
+def plot_speedup_per_query(dpi: int = DEFAULT_DPI, force: bool = False):
     """Plot speedup per query for each scale."""
     print("Generating speedup per query graph...")
     
+    output_file = FIGURES_DIR / "speedup_per_query.png"
+    if not force and not _needs_rebuild(output_file, RESULTS_DIR.glob("latency_*_*.json"), dpi):
+        print(f"  Up to date: {output_file}")
+        return True
+    
     # Collect speedup data
     speedup_data = {}
     
     for scale in SCALES:
-        no_index_results = load_latency_results(scale, "no_index")
-        with_index_results = load_latency_results(scale, "with_index")
+        no_index_arrays = load_p50_by_query(scale, "no_index")
+        with_index_arrays = load_p50_by_query(scale, "with_index")
         
-        if no_index_results and with_index_results:
-            speedups = []
-            query_numbers = []
+        if no_index_arrays and with_index_arrays:
+            # Match queries by query_number on the pre-sorted key arrays
+            no_nums, no_p50 = no_index_arrays
+            with_nums, with_p50 = with_index_arrays
+            common, no_idx, with_idx = np.intersect1d(
+                no_nums, with_nums, assume_unique=True, return_indices=True
+            )
+            no_p50 = no_p50[no_idx]
+            with_p50 = with_p50[with_idx]
             
-            # Match queries by query_number
-            no_index_queries = {q.get("query_number"): q for q in no_index_results.get("queries", [])}
-            with_index_queries = {q.get("query_number"): q for q in with_index_results.get("queries", [])}
-            
-            for query_num in sorted(set(no_index_queries.keys()) & set(with_index_queries.keys())):
-                no_p50 = no_index_queries[query_num].get("statistics", {}).get("p50")
-                with_p50 = with_index_queries[query_num].get("statistics", {}).get("p50")
-                
-                if no_p50 is not None and with_p50 is not None and with_p50 > 0:
-                    speedup = no_p50 / with_p50
-                    speedups.append(speedup)
-                    query_numbers.append(query_num)
+            # Keep queries with both timings and a positive with_index p50
+            valid = np.isfinite(no_p50) & (with_p50 > 0)
+            query_numbers = common[valid].tolist()
+            speedups = (no_p50[valid] / with_p50[valid]).tolist()
             
             if speedups:
                 speedup_data[scale] = {
@@ -165,17 +353,18 @@ def plot_speedup_per_query():
         print("  No data available for speedup per query")
         return False
     
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = _get_axes((14, 6))
     
     x_offset = 0
-    colors = {'small': '#1f77b4', 'medium': '#ff7f0e', 'large': '#2ca02c'}
+    # Opaque colors matching the previous 70% alpha over white
+    colors = {'small': '#62a0ca', 'medium': '#ffa556', 'large': '#6bbc6b'}
     
     for scale in SCALES:
         if scale in speedup_data:
             data = speedup_data[scale]
             x = np.arange(len(data["query_numbers"])) + x_offset
             ax.bar(x, data["speedups"], width=0.25, label=f'{scale.capitalize()} scale', 
-                  color=colors.get(scale, '#1f77b4'), alpha=0.7)
+                  color=colors.get(scale, '#62a0ca'))
             x_offset += 0.25
     
     ax.set_xlabel('Query Number', fontsize=12)
@@ -193,29 +382,31 @@ def plot_speedup_per_query():
     ax.grid(True, alpha=0.3, axis='y')
     ax.axhline(y=1.0, color='r', linestyle='--', alpha=0.5, linewidth=1)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
-    output_file = FIGURES_DIR / "speedup_per_query.png"
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_file, dpi=150, bbox_inches='tight')
-    plt.close()
+    _save_figure(fig, output_file, dpi)
     
     print(f"  Saved to: {output_file}")
     return True
 
 
-def plot_throughput_vs_concurrency():
+def plot_throughput_vs_concurrency(dpi: int = DEFAULT_DPI, force: bool = False):
     """Plot throughput (QPS) vs concurrency level."""
     print("Generating throughput vs concurrency graph...")
     
+    output_file = FIGURES_DIR / "throughput_vs_concurrency.png"
+    if not force and not _needs_rebuild(output_file, RESULTS_DIR.glob("throughput_*_*.json"), dpi):
+        print(f"  Up to date: {output_file}")
+        return True
+    
     # Collect throughput data by scale and concurrency
     throughput_data = {}
     
     for scale in SCALES:
-        results = load_throughput_results(scale, "with_index")
-        if results:
-            concurrency = results.get("metadata", {}).get("concurrency")
-            total_qps = results.get("metadata", {}).get("total_qps")
+        metadata = load_throughput_metadata(scale, "with_index")
+        if metadata:
+            concurrency = metadata.get("concurrency")
+            total_qps = metadata.get("total_qps")
             
             if concurrency is not None and total_qps is not None:
                 if scale not in throughput_data:
@@ -227,7 +418,7 @@ def plot_throughput_vs_concurrency():
         print("  No data available for throughput vs concurrency")
         return False
     
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = _get_axes((10, 6))
     
     colors = {'small': '#1f77b4', 'medium': '#ff7f0e', 'large': '#2ca02c'}
     markers = {'small': 'o', 'medium': 's', 'large': '^'}
@@ -236,11 +427,12 @@ def plot_throughput_vs_concurrency():
         if scale in throughput_data:
             data = throughput_data[scale]
             if data["concurrency"] and data["qps"]:
-                # Sort by concurrency
-                sorted_data = sorted(zip(data["concurrency"], data["qps"]))
-                concurrency_sorted, qps_sorted = zip(*sorted_data)
+                # Sort by concurrency (ties keep QPS order, as sorting the pairs did)
+                concurrency = np.asarray(data["concurrency"])
+                qps = np.asarray(data["qps"], dtype=np.float64)
+                order = np.lexsort((qps, concurrency))
                 
-                ax.plot(concurrency_sorted, qps_sorted, 
+                ax.plot(concurrency[order], qps[order], 
                        marker=markers.get(scale, 'o'), 
                        label=f'{scale.capitalize()} scale',
                        color=colors.get(scale, '#1f77b4'),
@@ -252,19 +444,24 @@ def plot_throughput_vs_concurrency():
     ax.legend()
     ax.grid(True, alpha=0.3)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
-    output_file = FIGURES_DIR / "throughput_vs_concurrency.png"
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_file, dpi=150, bbox_inches='tight')
-    plt.close()
+    _save_figure(fig, output_file, dpi)
     
     print(f"  Saved to: {output_file}")
     return True
 
 
-def main():
-    """Main function."""
+def main(argv=None):
+    """
+    Main function.
+    
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+    
+    Returns:
+        Process exit code
+    """
     parser = argparse.ArgumentParser(
         description="Generate graphs from benchmark results"
     )
@@ -288,30 +485,49 @@ def main():
         action="store_true",
         help="Generate throughput vs concurrency graph"
     )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help=f"Render at {FAST_DPI} DPI instead of {DEFAULT_DPI} for quick iterations"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate graphs even if they are newer than all results files and were "
+             "rendered with the same options"
+    )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # If no specific graph requested, generate all
     generate_all = args.all or not (args.latency_scale or args.speedup or args.throughput)
+    dpi = FAST_DPI if args.fast else DEFAULT_DPI
     
     print("Generating graphs from benchmark results...")
     print(f"Results directory: {RESULTS_DIR}")
     print(f"Figures directory: {FIGURES_DIR}")
     print()
     
-    success_count = 0
-    
+    plot_functions = []
     if generate_all or args.latency_scale:
-        if plot_latency_vs_scale():
-            success_count += 1
-    
+        plot_functions.append(plot_latency_vs_scale)
     if generate_all or args.speedup:
-        if plot_speedup_per_query():
-            success_count += 1
-    
+        plot_functions.append(plot_speedup_per_query)
     if generate_all or args.throughput:
-        if plot_throughput_vs_concurrency():
-            success_count += 1
+        plot_functions.append(plot_throughput_vs_concurrency)
+    
+    # Each graph renders independently, so render them in separate processes
+    if len(plot_functions) > 1:
+        with ProcessPoolExecutor(max_workers=len(plot_functions)) as executor:
+            futures = [
+                executor.submit(plot_function, dpi, args.force)
+                for plot_function in plot_functions
+            ]
+            results = [future.result() for future in futures]
+    else:
+        results = [plot_function(dpi, args.force) for plot_function in plot_functions]
+    
+    success_count = sum(results)
     
     print()
     print("=" * 60)
@@ -7,28 +7,137 @@ Reads configuration from config.yaml for reproducibility.
 import os
 import sys
 import yaml
+import importlib
+import threading
 import subprocess
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as YamlLoader
+
 # Project root
 PROJECT_ROOT = Path(__file__).parent.parent
 CONFIG_FILE = PROJECT_ROOT / "config.yaml"
 
+# Valid benchmark parameters (mirroring the limits enforced by the scripts)
+VALID_SCALES = ["small", "medium", "large"]
+VALID_INDEX_CONFIGS = ["no_index", "with_index"]
+CONCURRENCY_RANGE = (1, 16)
+DURATION_RANGE = (20, 60)
+
+# Scripts the suite runs, relative to the project root
+REQUIRED_SCRIPTS = [
+    "data/raw/generate_data.py",
+    "benchmarks/load_data.py",
+    "benchmarks/apply_indexes.py",
+    "benchmarks/run_benchmarks.py",
+    "benchmarks/explain.py",
+    "benchmarks/analyze_results.py",
+    "benchmarks/plot_results.py",
+]
+
+# Parsed configuration, cached after the first load_config() call
+_config = None
+
+# Last index action applied by this runner ("apply" or "drop"), None if unknown
+_index_state = None
+
+
+def scale_data_dir(scale):
+    """Return the data directory for a scale, relative to the project root."""
+    return f"data/raw/{scale}"
+
 
 def load_config():
-    """Load configuration from config.yaml."""
+    """Load configuration from config.yaml (parsed once per process)."""
+    global _config
+    if _config is not None:
+        return _config
+    
     if not CONFIG_FILE.exists():
         print(f"Error: Configuration file not found: {CONFIG_FILE}")
         sys.exit(1)
     
     try:
         with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+            # libyaml-backed loader when available, same safe semantics
+            _config = yaml.load(f, Loader=YamlLoader)
+        return _config
     except Exception as e:
         print(f"Error loading config.yaml: {e}")
         sys.exit(1)
 
 
+def preflight(config):
+    """
+    Validate the configuration and required scripts before running any step.
+    
+    Catches problems that would otherwise only surface after the earlier
+    (possibly hours-long) steps have completed.
+    
+    Args:
+        config: Parsed configuration
+    
+    Returns:
+        List of error messages (empty if everything is valid)
+    """
+    errors = []
+    
+    for script in REQUIRED_SCRIPTS:
+        if not (PROJECT_ROOT / script).exists():
+            errors.append(f"Script not found: {script}")
+    
+    if not isinstance(config, dict):
+        errors.append("config.yaml must contain a mapping")
+        return errors
+    
+    db_config = config.get("database", {}) or {}
+    try:
+        int(db_config.get("port", 5432))
+    except (TypeError, ValueError):
+        errors.append(f"Database port must be an integer (got {db_config.get('port')!r})")
+    
+    bench_config = config.get("benchmarks", {}) or {}
+    
+    scales = bench_config.get("scales", ["small"])
+    if not scales or not set(scales) <= set(VALID_SCALES):
+        errors.append(f"benchmarks.scales must be a non-empty subset of {VALID_SCALES} "
+                      f"(got {scales})")
+    
+    index_configs = bench_config.get("index_configs", ["no_index", "with_index"])
+    if not index_configs or not set(index_configs) <= set(VALID_INDEX_CONFIGS):
+        errors.append(
+            f"benchmarks.index_configs must be a non-empty subset of {VALID_INDEX_CONFIGS} "
+            f"(got {index_configs})"
+        )
+    
+    latency_config = bench_config.get("latency", {}) or {}
+    for key, default, minimum in [("warmup_runs", 2, 0), ("measurement_runs", 10, 1)]:
+        value = latency_config.get(key, default)
+        if not isinstance(value, int) or value < minimum:
+            errors.append(f"benchmarks.latency.{key} must be an integer >= {minimum} "
+                          f"(got {value!r})")
+    
+    throughput_config = bench_config.get("throughput", {}) or {}
+    for concurrency in throughput_config.get("concurrency_levels", [4, 8]):
+        if (not isinstance(concurrency, int)
+                or not CONCURRENCY_RANGE[0] <= concurrency <= CONCURRENCY_RANGE[1]):
+            errors.append(
+                f"benchmarks.throughput.concurrency_levels must be between "
+                f"{CONCURRENCY_RANGE[0]} and {CONCURRENCY_RANGE[1]} (got {concurrency!r})"
+            )
+    duration = throughput_config.get("duration_seconds", 30)
+    if not isinstance(duration, int) or not DURATION_RANGE[0] <= duration <= DURATION_RANGE[1]:
+        errors.append(
+            f"benchmarks.throughput.duration_seconds must be between "
+            f"{DURATION_RANGE[0]} and {DURATION_RANGE[1]} (got {duration!r})"
+        )
+    
+    return errors
+
+
 def set_env_vars(config):
     """Set environment variables from config."""
     db_config = config.get("database", {})
@@ -39,20 +148,126 @@ def set_env_vars(config):
     os.environ["DB_PASSWORD"] = db_config.get("password", "benchmark")
 
 
-def run_command(cmd, description):
-    """Run a command and handle errors."""
+def spawn_command(cmd, description, prefix=""):
+    """
+    Start a command without waiting for it.
+    
+    The child's stdout and stderr are merged into a pipe that a background
+    thread copies to this process's stdout line by line, so several
+    commands can run at once without blocking on a full pipe buffer.
+    
+    Args:
+        cmd: Command and arguments
+        description: Step description for logging
+        prefix: Text prepended to every output line (to tell commands apart)
+    
+    Returns:
+        Tuple of (process, output thread)
+    """
     print(f"\n{'='*60}")
     print(f"{description}")
     print(f"{'='*60}")
     print(f"Command: {' '.join(cmd)}")
     print()
     
-    result = subprocess.run(cmd, cwd=PROJECT_ROOT)
+    # Unbuffered child output so lines stream through as they are printed
+    process = subprocess.Popen(
+        cmd,
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+    )
+    
+    def pump_output():
+        for line in process.stdout:
+            sys.stdout.write(prefix + line)
+            sys.stdout.flush()
+        process.stdout.close()
+    
+    thread = threading.Thread(target=pump_output, daemon=True)
+    thread.start()
+    return process, thread
+
+
+def wait_command(process, thread, description):
+    """
+    Wait for a command started with spawn_command() and check its exit code.
+    
+    Returns:
+        True if the command succeeded
+    """
+    returncode = process.wait()
+    thread.join()
+    
+    if returncode != 0:
+        print(f"\nError: {description} failed with exit code {returncode}")
+        return False
+    
+    return True
+
+
+def run_script(module_name, args, description):
+    """
+    Run a benchmark script's main() in this process.
+    
+    Avoids starting a new interpreter (and re-importing pandas, numpy and
+    psycopg2) for every step. Scripts that exit via sys.exit() are handled
+    like a subprocess exit code.
+    
+    Args:
+        module_name: Module in the benchmarks/ directory (e.g. "load_data")
+        args: Command-line arguments for the script
+        description: Step description for logging
+    
+    Returns:
+        True if the script succeeded
+    """
+    print(f"\n{'='*60}")
+    print(f"{description}")
+    print(f"{'='*60}")
+    print(f"Command: python benchmarks/{module_name}.py {' '.join(args)}")
+    print()
+    
+    try:
+        returncode = importlib.import_module(module_name).main(args)
+    except SystemExit as e:
+        returncode = e.code
+    except Exception as e:
+        print(f"\nError: {description} failed: {e}")
+        return False
+    
+    if returncode:
+        print(f"\nError: {description} failed with exit code {returncode}")
+        return False
+    
+    return True
+
+
+def ensure_index_state(target, description):
+    """
+    Apply or drop the benchmark indexes unless they are already in that state.
+    
+    Args:
+        target: "apply" or "drop"
+        description: Step description for logging
+    
+    Returns:
+        True if the indexes are in the requested state
+    """
+    global _index_state
+    if _index_state == target:
+        state = "applied" if target == "apply" else "dropped"
+        print(f"\nIndexes already {state}, skipping: {description}")
+        return True
     
-    if result.returncode != 0:
-        print(f"\nError: {description} failed with exit code {result.returncode}")
+    if not run_script("apply_indexes", [target], description):
+        _index_state = None
         return False
     
+    _index_state = target
     return True
 
 
@@ -64,31 +279,51 @@ def generate_data(config):
     print("STEP 1: Generate Data")
     print("="*60)
     
+    # Each scale writes to its own directory, so start all scales at once
+    # and collect their exit codes afterwards. The CPUs are split across the
+    # scales so the generators' worker pools do not oversubscribe the machine
+    # (the output is the same for any --jobs).
+    jobs = max(1, (os.cpu_count() or 1) // max(1, len(scales)))
+    running = []
     for scale in scales:
-        if not run_command(
-            ["python", "data/raw/generate_data.py", "--scale", scale],
-            f"Generating {scale} dataset"
-        ):
-            return False
+        description = f"Generating {scale} dataset"
+        process, thread = spawn_command(
+            [sys.executable, "data/raw/generate_data.py",
+             "--scale", scale,
+             "--output-dir", scale_data_dir(scale),
+             "--jobs", str(jobs)],
+            description,
+            prefix=f"[{scale}] "
+        )
+        running.append((process, thread, description))
     
-    return True
+    results = [wait_command(*command) for command in running]
+    return all(results)
 
 
 def load_data(config):
     """Load data into database for all scales."""
+    global _index_state
+    
     scales = config.get("benchmarks", {}).get("scales", ["small"])
     
     print("\n" + "="*60)
     print("STEP 2: Load Data into Database")
     print("="*60)
     
+    # All scales load into the same tables, so loads stay serial
     for scale in scales:
-        if not run_command(
-            ["python", "benchmarks/load_data.py", "--scale", scale],
+        if not run_script(
+            "load_data",
+            ["--scale", scale,
+             "--data-dir", scale_data_dir(scale)],
             f"Loading {scale} dataset"
         ):
             return False
     
+    # Loading recreates the schema, which has no secondary indexes
+    _index_state = "drop"
+    
     return True
 
 
@@ -106,17 +341,16 @@ def run_latency_benchmarks(config):
     
     for scale in scales:
         for index_config in index_configs:
+            # Apply indexes for with_index, make sure they are gone otherwise
             if index_config == "with_index":
-                # Apply indexes first
-                if not run_command(
-                    ["python", "benchmarks/apply_indexes.py", "apply"],
-                    f"Applying indexes for {scale} scale"
-                ):
+                if not ensure_index_state("apply", f"Applying indexes for {scale} scale"):
                     return False
+            elif not ensure_index_state("drop", f"Dropping indexes for {scale} scale"):
+                return False
             
-            if not run_command(
-                ["python", "benchmarks/run_benchmarks.py", 
-                 "--scale", scale,
+            if not run_script(
+                "run_benchmarks",
+                ["--scale", scale,
                  "--index-config", index_config,
                  "--warmup-runs", str(warmup),
                  "--measurement-runs", str(measurement)],
@@ -139,17 +373,14 @@ def run_throughput_benchmarks(config):
     print("="*60)
     
     # Ensure indexes are applied
-    if not run_command(
-        ["python", "benchmarks/apply_indexes.py", "apply"],
-        "Applying indexes for throughput benchmarks"
-    ):
+    if not ensure_index_state("apply", "Applying indexes for throughput benchmarks"):
         return False
     
     for scale in scales:
         for concurrency in concurrency_levels:
-            if not run_command(
-                ["python", "benchmarks/run_benchmarks.py",
-                 "--scale", scale,
+            if not run_script(
+                "run_benchmarks",
+                ["--scale", scale,
                  "--index-config", "with_index",
                  "--concurrency", str(concurrency),
                  "--duration", str(duration)],
@@ -172,22 +403,16 @@ def capture_explain_plans(config):
     for index_config in index_configs:
         if index_config == "with_index":
             # Apply indexes first
-            if not run_command(
-                ["python", "benchmarks/apply_indexes.py", "apply"],
-                "Applying indexes for EXPLAIN plans"
-            ):
+            if not ensure_index_state("apply", "Applying indexes for EXPLAIN plans"):
                 return False
         else:
             # Drop indexes for no_index baseline
-            if not run_command(
-                ["python", "benchmarks/apply_indexes.py", "drop"],
-                "Dropping indexes for baseline"
-            ):
+            if not ensure_index_state("drop", "Dropping indexes for baseline"):
                 return False
         
         for scale in scales:
-            if not run_command(
-                ["python", "benchmarks/explain.py", "--index-config", index_config],
+            if not run_script(
+                "explain", ["--index-config", index_config],
                 f"Capturing EXPLAIN plans ({index_config}, {scale})"
             ):
                 return False
@@ -204,15 +429,15 @@ def analyze_results(config):
     print("="*60)
     
     if analysis_config.get("generate_summary", True):
-        if not run_command(
-            ["python", "benchmarks/analyze_results.py"],
+        if not run_script(
+            "analyze_results", [],
             "Generating summary CSV"
         ):
             return False
     
     if analysis_config.get("generate_plots", True):
-        if not run_command(
-            ["python", "benchmarks/plot_results.py"],
+        if not run_script(
+            "plot_results", [],
             "Generating plots"
         ):
             return False
@@ -228,10 +453,23 @@ def main():
     print(f"Configuration file: {CONFIG_FILE}")
     print()
     
-    # Load configuration
+    # Load and validate configuration before doing any work
     config = load_config()
+    
+    errors = preflight(config)
+    if errors:
+        print("Error: Preflight checks failed:")
+        for error in errors:
+            print(f"  - {error}")
+        sys.exit(1)
+    
     set_env_vars(config)
     
+    # Steps run in-process: resolve relative paths from the project root and
+    # import the benchmark scripts after DB_* variables are set
+    os.chdir(PROJECT_ROOT)
+    sys.path.insert(0, str(PROJECT_ROOT / "benchmarks"))
+    
     # Run benchmark steps
     steps = [
         ("Generate Data", generate_data),
@@ -8,15 +8,31 @@ import os
 import sys
 import json
 import csv
-import re
 import time
+import pickle
+import random
+import subprocess
+import threading
 import argparse
-import statistics
+import asyncio
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import psycopg2
+import psycopg2.pool
+
+try:
+    import orjson
+except ImportError:  # optional dependency, fall back to the stdlib serializer
+    orjson = None
+
+try:
+    import asyncpg
+except ImportError:  # optional dependency, only needed for --driver asyncpg
+    asyncpg = None
 
 # Default database configuration (can be overridden by environment variables)
 DEFAULT_CONFIG = {
@@ -27,21 +43,137 @@ DEFAULT_CONFIG = {
     "password": os.getenv("DB_PASSWORD", "benchmark"),
 }
 
+# libpq connection options for benchmark sessions: TCP keepalives so idle
+# connections between runs are not dropped by middleboxes, a recognizable
+# application_name in pg_stat_activity, and no server-side timeouts.
+# TCP_NODELAY is already set by libpq on every TCP connection.
+CONNECTION_OPTIONS = {
+    "application_name": "sql-bench",
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 5,
+    "options": "-c statement_timeout=0 -c lock_timeout=0",
+}
+
 # Directories
 SQL_DIR = Path(__file__).parent.parent / "sql"
 RESULTS_DIR = Path(__file__).parent.parent / "results" / "metrics"
 
+# Marker line in front of every query block in queries.sql: "-- Query N: Description"
+QUERY_MARKER = "\n-- Query "
+
+# Parsed queries cached next to the SQL file, keyed by (path, mtime, size)
+QUERIES_CACHE_FILE = SQL_DIR / ".queries.cache.pkl"
+
 # Benchmark configuration
 DEFAULT_WARMUP_RUNS = 2
 DEFAULT_MEASUREMENT_RUNS = 10
 DEFAULT_CONCURRENCY = 4
 DEFAULT_DURATION_SECONDS = 30
+DEFAULT_MEASURE_WORKERS = 1
+
+# How a query run is timed (latency and throughput modes):
+#   fetchall         - execute and fetch every row into Python (client-observed latency)
+#   count            - wrap the query in SELECT count(*) so only one row is returned
+#   explain_analyze  - use the server-reported Execution Time from EXPLAIN ANALYZE
+#                      (TIMING OFF, so per-node clock reads don't inflate it)
+#                      and report Planning Time separately in latency runs
+#   copy             - stream the result as COPY (...) TO STDOUT (FORMAT binary) and
+#                      discard it: full server execution and transfer, no Python rows
+MEASURE_MODES = ["fetchall", "count", "explain_analyze", "copy"]
+DEFAULT_MEASURE_MODE = "fetchall"
+
+# Cache state for latency measurement runs:
+#   warm   - consecutive runs, data stays cached (default)
+#   cold   - evict caches on the database host before every measurement run
+#   mixed  - evict them before a random half of the runs
+# Without --evict-command, eviction drops this machine's OS page cache, which
+# is only the database's cache when the database runs here (LOCAL_DB_HOSTS or
+# a Unix socket directory).
+CACHE_MODES = ["warm", "cold", "mixed"]
+DEFAULT_CACHE_MODE = "warm"
+LOCAL_DB_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+# Untimed query touching the column types the workload returns, run once per
+# benchmark so result conversion is initialized before the first warmup
+PRIME_QUERY = (
+    "SELECT 1::int, 1::bigint, 1.0::float8, 1.0::numeric, true, "
+    "'2020-01-01'::date, '2020-01-01 00:00'::timestamp, 'x'::text"
+)
+
+# Client library used for latency runs. asyncpg speaks the binary protocol
+# and caches prepared statements itself; psycopg2 is the default.
+DRIVERS = ["psycopg2", "asyncpg"]
+DEFAULT_DRIVER = "psycopg2"
+
+# Result types whose text values psycopg2 otherwise turns into Decimal, date,
+# time, datetime and timedelta objects: numeric, date, time, timestamp,
+# timestamptz and interval. With --raw-values they are returned as strings.
+RAW_VALUE_OIDS = (1700, 1082, 1083, 1114, 1184, 1186)
+RAW_VALUE_TYPE = psycopg2.extensions.new_type(RAW_VALUE_OIDS, "RAW_VALUE", lambda value, cur: value)
+
+# plan_cache_mode for every benchmark session. It decides whether prepared
+# statements (--prepare, asyncpg's statement cache) use a generic or a custom
+# plan; "auto" switches to a generic plan after five custom ones, which can
+# show up as a latency step inside the measurement runs.
+PLAN_CACHE_MODES = {
+    "auto": "auto",
+    "generic": "force_generic_plan",
+    "custom": "force_custom_plan",
+}
+DEFAULT_PLAN_CACHE_MODE = "auto"
+
+# Order of latency measurement runs:
+#   sequential   - all runs of query 1, then all runs of query 2, ... (default)
+#   interleaved  - round-robin: run 1 of every query, then run 2 of every query, ...
+#   random       - every (query, run) pair in a seeded random order
+SCHEDULES = ["sequential", "interleaved", "random"]
+DEFAULT_SCHEDULE = "sequential"
+
+# Throughput results keep a uniform random sample of this many raw timings
+# per query, plus counts over fixed log-spaced buckets from 1 us to 60 s
+# (100 buckets, ~12% wide each) covering every completed run
+THROUGHPUT_RAW_SAMPLE = 1000
+HISTOGRAM_EDGES_MS = np.geomspace(1e-3, 6e4, 101)
+
+# Statistics written to the latency summary CSV, in column order
+CSV_STAT_KEYS = ("min", "max", "mean", "median", "p50", "p95", "p99", "stddev")
 
+# Set once dropping the OS page cache has failed, to warn only once
+_drop_caches_failed = False
 
-def get_db_connection():
-    """Create and return a database connection."""
+# Parsed queries by (path, mtime_ns, size), for repeated runs in one process
+_queries_memo = {}
+
+
+def connection_options(plan_cache_mode: str = DEFAULT_PLAN_CACHE_MODE) -> Dict[str, Any]:
+    """
+    CONNECTION_OPTIONS with the session's plan_cache_mode added to the
+    server options (see PLAN_CACHE_MODES).
+    """
+    options = dict(CONNECTION_OPTIONS)
+    options["options"] += f" -c plan_cache_mode={PLAN_CACHE_MODES[plan_cache_mode]}"
+    return options
+
+
+def get_db_connection(raw_values: bool = False,
+                      plan_cache_mode: str = DEFAULT_PLAN_CACHE_MODE):
+    """
+    Create and return a database connection.
+    
+    The connection is in autocommit mode: benchmark queries are read-only,
+    so no implicit BEGIN is sent in front of every run.
+    
+    Args:
+        raw_values: Return RAW_VALUE_OIDS columns as strings (see RAW_VALUE_OIDS)
+        plan_cache_mode: Session plan cache mode (see PLAN_CACHE_MODES)
+    """
     try:
-        conn = psycopg2.connect(**DEFAULT_CONFIG)
+        conn = psycopg2.connect(**DEFAULT_CONFIG, **connection_options(plan_cache_mode))
+        conn.autocommit = True
+        if raw_values:
+            psycopg2.extensions.register_type(RAW_VALUE_TYPE, conn)
         return conn
     except psycopg2.OperationalError as e:
         print(f"Error connecting to database: {e}")
@@ -50,6 +182,66 @@ def get_db_connection():
         sys.exit(1)
 
 
+def create_connection_pool(size: int, raw_values: bool = False,
+                           plan_cache_mode: str = DEFAULT_PLAN_CACHE_MODE):
+    """
+    Create a thread-safe pool of database connections.
+    
+    All connections are opened up front and kept: psycopg2 closes returned
+    connections beyond minconn, so minconn equals the pool size. They use
+    the same options and autocommit mode as get_db_connection().
+    
+    Args:
+        size: Number of connections in the pool
+        raw_values: Return RAW_VALUE_OIDS columns as strings (see RAW_VALUE_OIDS)
+        plan_cache_mode: Session plan cache mode (see PLAN_CACHE_MODES)
+    
+    Returns:
+        psycopg2 ThreadedConnectionPool
+    """
+    try:
+        pool = psycopg2.pool.ThreadedConnectionPool(
+            size, size, **DEFAULT_CONFIG, **connection_options(plan_cache_mode)
+        )
+        connections = [pool.getconn() for _ in range(size)]
+        for conn in connections:
+            conn.autocommit = True
+            if raw_values:
+                psycopg2.extensions.register_type(RAW_VALUE_TYPE, conn)
+            pool.putconn(conn)
+        return pool
+    except psycopg2.OperationalError as e:
+        print(f"Error connecting to database: {e}")
+        print("\nMake sure PostgreSQL is running and check your environment variables:")
+        print("  DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD")
+        sys.exit(1)
+
+
+def execute_pooled_query_timing(pool, query: str, measure: str = DEFAULT_MEASURE_MODE,
+                                statement: Optional[str] = None,
+                                planning_times: Optional[List[int]] = None) -> int:
+    """
+    Execute a query on a connection borrowed from a pool.
+    
+    Args:
+        pool: ThreadedConnectionPool to borrow the connection from
+        query: SQL query to execute
+        measure: Measurement mode (see MEASURE_MODES)
+        statement: Name of the prepared statement to execute instead of query
+        planning_times: List receiving the server planning time (ns) in
+            explain_analyze mode
+    
+    Returns:
+        Execution time in integer nanoseconds
+    """
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            return execute_query_timing(cur, query, measure, statement, planning_times)
+    finally:
+        pool.putconn(conn)
+
+
 def parse_queries(queries_file):
     """
     Parse SQL queries from the queries.sql file.
@@ -59,31 +251,93 @@ def parse_queries(queries_file):
         print(f"Error: Queries file not found: {queries_file}")
         sys.exit(1)
     
+    return _load_cached_queries(queries_file)
+
+
+def _load_cached_queries(queries_file):
+    """
+    Return parsed queries from the pickle cache, reparsing on a miss.
+    
+    Results are also memoized in-process, so repeated in-process runs (as
+    run_all_benchmarks.py does) skip the pickle load as well.
+    
+    Args:
+        queries_file: Path to queries.sql
+    
+    Returns:
+        List of tuples: (query_number, description, sql_query)
+    """
+    stat = queries_file.stat()
+    cache_key = (str(queries_file.resolve()), stat.st_mtime_ns, stat.st_size)
+    
+    if cache_key in _queries_memo:
+        return list(_queries_memo[cache_key])
+    
+    try:
+        with open(QUERIES_CACHE_FILE, "rb") as f:
+            cached_key, queries = pickle.load(f)
+        if cached_key == cache_key:
+            _queries_memo[cache_key] = queries
+            return list(queries)
+    except Exception:
+        # Missing, stale-format or corrupt cache: fall through and reparse
+        pass
+    
+    queries = _parse_queries_file(queries_file)
+    
+    try:
+        with open(QUERIES_CACHE_FILE, "wb") as f:
+            pickle.dump((cache_key, queries), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"Warning: could not write queries cache {QUERIES_CACHE_FILE}: {e}")
+    
+    _queries_memo[cache_key] = queries
+    return list(queries)
+
+
+def _split_query_blocks(content):
+    """
+    Split queries.sql into query blocks with plain string operations.
+    
+    A "-- Query" line that is not followed by "N:" stays part of the
+    previous block, as with the former regex lookahead.
+    
+    Args:
+        content: Text of queries.sql
+    
+    Returns:
+        List of tuples: (query_number, description, sql_block)
+    """
+    blocks = []
+    # Prefix a newline so a marker on the very first line is split as well
+    for chunk in ("\n" + content).split(QUERY_MARKER)[1:]:
+        num_str, sep, rest = chunk.partition(":")
+        if not sep or not num_str.isdigit():
+            if blocks:
+                query_num, description, sql = blocks[-1]
+                blocks[-1] = (query_num, description, sql + QUERY_MARKER + chunk)
+            continue
+        
+        description, _, sql = rest.lstrip().partition("\n")
+        blocks.append((int(num_str), description.strip(), sql))
+    
+    return blocks
+
+
+def _parse_queries_file(queries_file):
+    """Parse queries.sql without consulting the cache."""
     with open(queries_file, "r", encoding="utf-8") as f:
         content = f.read()
     
-    # Pattern to match query blocks: "-- Query N: Description" followed by SQL
-    pattern = r'-- Query (\d+):\s*([^\n]+)\n(.*?)(?=\n-- Query \d+:|$)'
-    matches = re.finditer(pattern, content, re.DOTALL)
-    
     queries = []
-    for match in matches:
-        query_num = int(match.group(1))
-        description = match.group(2).strip()
-        sql = match.group(3).strip()
-        
-        # Clean up SQL: remove leading/trailing whitespace and comments
-        sql_lines = []
-        for line in sql.split('\n'):
-            line = line.strip()
-            # Skip empty lines and comment-only lines
-            if line and not line.startswith('--'):
-                sql_lines.append(line)
-        
-        sql_query = ' '.join(sql_lines)
+    for query_num, description, sql in _split_query_blocks(content):
+        # Clean up SQL: strip every line, skip empty and comment-only lines
+        sql_query = ' '.join(
+            line for line in map(str.strip, sql.splitlines())
+            if line and not line.startswith('--')
+        )
         # Remove trailing semicolon if present
-        if sql_query.endswith(';'):
-            sql_query = sql_query[:-1]
+        sql_query = sql_query.rstrip(';').rstrip()
         
         if sql_query:
             queries.append((query_num, description, sql_query))
@@ -91,108 +345,726 @@ def parse_queries(queries_file):
     return queries
 
 
-def execute_query_timing(conn, query: str) -> float:
+def prepare_statement(conn, name: str, query: str, measure: str = DEFAULT_MEASURE_MODE):
     """
-    Execute a query and return execution time in milliseconds.
+    PREPARE the statement executed by measurement runs on a connection.
+    
+    In count mode the count(*) wrapper is part of the prepared statement.
     
     Args:
         conn: Database connection
-        query: SQL query to execute
-    
-    Returns:
-        Execution time in milliseconds
+        name: Prepared statement name
+        query: SQL query to prepare
+        measure: Measurement mode (see MEASURE_MODES)
     """
+    if measure == "count":
+        query = f"SELECT count(*) FROM ({query}) _"
+    
     cur = conn.cursor()
+    try:
+        cur.execute(f"PREPARE {name} AS {query}")
+    finally:
+        cur.close()
+
+
+def deallocate_statement(conn, name: str):
+    """Release a prepared statement, ignoring connections that lost it."""
+    cur = conn.cursor()
+    try:
+        cur.execute(f"DEALLOCATE {name}")
+    except psycopg2.Error:
+        conn.rollback()
+    finally:
+        cur.close()
+
+
+def prime_connection(conn):
+    """
+    Run PRIME_QUERY once so psycopg2 type conversion and the session are
+    initialized before any benchmark query is executed.
     
+    Args:
+        conn: Database connection
+    """
+    cur = conn.cursor()
     try:
-        t0 = time.perf_counter()
-        cur.execute(query)
-        cur.fetchall()  # Fetch all results to ensure complete execution
-        t1 = time.perf_counter()
-        
-        dt = (t1 - t0) * 1000  # Convert to milliseconds
-        return dt
+        cur.execute(PRIME_QUERY)
+        cur.fetchall()
     finally:
         cur.close()
 
 
-def run_benchmark(conn, query: str, query_num: int, warmup_runs: int, measurement_runs: int) -> Dict[str, Any]:
+def database_is_local() -> bool:
+    """True if the database server runs on this machine (TCP loopback or Unix socket)."""
+    host = DEFAULT_CONFIG["host"] or ""
+    return host in LOCAL_DB_HOSTS or host == "" or host.startswith("/")
+
+
+def drop_caches(evict_command: Optional[str] = None) -> bool:
+    """
+    Evict cached data on the database host before a cold measurement run.
+    
+    With an eviction command, runs it through the shell (e.g. an ssh or
+    docker exec that drops the page cache and restarts the server). Without
+    one, flushes dirty pages and drops this machine's OS page cache through
+    passwordless sudo, which only reaches the database when it runs locally
+    (checked by run_benchmarks()). PostgreSQL's shared_buffers are not
+    affected by the page cache drop; only a server restart empties them.
+    
+    Args:
+        evict_command: Shell command evicting the database host's caches
+    
+    Returns:
+        True if eviction ran successfully; the run only counts as cold then
+    """
+    global _drop_caches_failed
+    
+    if evict_command is not None:
+        dropped = subprocess.run(
+            evict_command, shell=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        ).returncode == 0
+        failure = f"eviction command failed: {evict_command}"
+    else:
+        subprocess.run(["sync"], check=False)
+        try:
+            dropped = subprocess.run(
+                ["sudo", "-n", "sh", "-c", "echo 3 > /proc/sys/vm/drop_caches"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            ).returncode == 0
+        except OSError:
+            # sudo not installed
+            dropped = False
+        failure = "could not drop the OS page cache (needs passwordless sudo)"
+    
+    if not dropped:
+        if not _drop_caches_failed:
+            print(f"\n  Warning: {failure}, affected runs are recorded as warm",
+                  end=" ", flush=True)
+        _drop_caches_failed = True
+        return False
+    return True
+
+
+class _DiscardWriter:
+    """File-like sink for copy_expert() that drops everything written to it."""
+    
+    def write(self, data):
+        return len(data)
+
+
+COPY_SINK = _DiscardWriter()
+
+
+def execute_query_timing(cur, query: str, measure: str = DEFAULT_MEASURE_MODE,
+                         statement: Optional[str] = None,
+                         planning_times: Optional[List[int]] = None) -> int:
+    """
+    Execute a query and return its execution time in nanoseconds.
+    
+    Client-side modes time the call with time.perf_counter_ns(); in
+    explain_analyze mode the server-reported time (ms) is converted to ns.
+    Callers convert to milliseconds when computing statistics.
+    
+    Args:
+        cur: Database cursor, reused across runs by the caller
+        query: SQL query to execute
+        measure: Measurement mode (see MEASURE_MODES)
+        statement: Name of a statement prepared with prepare_statement() to
+            EXECUTE instead of sending the query text
+        planning_times: List receiving the server-reported planning time (ns)
+            of this run in explain_analyze mode, so parse/plan cost can be
+            reported separately from execution
+    
+    Returns:
+        Execution time in integer nanoseconds (time.perf_counter_ns() units)
+    """
+    if statement is not None:
+        # Plan is cached server-side, only the short EXECUTE goes over the wire
+        query = f"EXECUTE {statement}"
+    
+    if measure == "explain_analyze":
+        # Server-side execution time only, no client fetch or transfer
+        cur.execute(f"EXPLAIN (ANALYZE, TIMING OFF, FORMAT JSON) {query}")
+        plan = cur.fetchone()[0]
+        if isinstance(plan, list):
+            plan = plan[0]
+        if planning_times is not None:
+            planning_times.append(round(plan.get("Planning Time", 0.0) * 1_000_000))
+        return round(plan["Execution Time"] * 1_000_000)
+    
+    if measure == "copy":
+        # Rows cross the wire in the binary COPY format and are discarded unparsed
+        t0 = time.perf_counter_ns()
+        cur.copy_expert(f"COPY ({query}) TO STDOUT (FORMAT binary)", COPY_SINK)
+        return time.perf_counter_ns() - t0
+    
+    if measure == "count":
+        # Only the count crosses the wire, rows are never materialized in Python
+        t0 = time.perf_counter_ns()
+        cur.execute(query if statement is not None else f"SELECT count(*) FROM ({query}) _")
+        cur.fetchone()
+        return time.perf_counter_ns() - t0
+    
+    t0 = time.perf_counter_ns()
+    cur.execute(query)
+    cur.fetchall()  # Fetch all results to ensure complete execution
+    return time.perf_counter_ns() - t0
+
+
+def run_warmups(cur, query: str, runs: int, measure: str = DEFAULT_MEASURE_MODE,
+                statement: Optional[str] = None):
+    """
+    Run untimed warmup runs of a query in a single round trip.
+    
+    The statement each measurement run would send is repeated and joined
+    with semicolons; the simple query protocol executes the whole string
+    server-side, so the warmups cost one network round trip in total.
+    
+    Args:
+        cur: Database cursor
+        query: SQL query to warm up
+        runs: Number of warmup runs
+        measure: Measurement mode (see MEASURE_MODES)
+        statement: Name of a prepared statement to EXECUTE instead of query
+    """
+    if runs < 1:
+        return
+    
+    if measure == "copy":
+        # COPY output has to be consumed per statement, so no batching here
+        for _ in range(runs):
+            execute_query_timing(cur, query, measure)
+        return
+    
+    if statement is not None:
+        sql = f"EXECUTE {statement}"
+    elif measure == "count":
+        sql = f"SELECT count(*) FROM ({query}) _"
+    else:
+        sql = query
+    if measure == "explain_analyze":
+        sql = f"EXPLAIN (ANALYZE, TIMING OFF, FORMAT JSON) {sql}"
+    
+    cur.execute(";\n".join([sql] * runs))
+    if cur.description is not None:
+        # Only the last statement's result reaches the client
+        cur.fetchall()
+
+
+def run_benchmark(conn, query: str, query_num: int, warmup_runs: int, measurement_runs: int,
+                  pool=None, executor=None, measure: str = DEFAULT_MEASURE_MODE,
+                  prepare: bool = False,
+                  cache_mode: str = DEFAULT_CACHE_MODE,
+                  rng: Optional[random.Random] = None,
+                  raw_file=None,
+                  evict_command: Optional[str] = None) -> Dict[str, Any]:
     """
     Run benchmark for a single query.
     
+    Measurement runs are serial on conn unless a pool and executor are given,
+    in which case they are dispatched concurrently. Concurrent runs shorten
+    wall time but contend for the server, so their latencies are not
+    comparable with serial ones.
+    
     Args:
         conn: Database connection
         query: SQL query to benchmark
         query_num: Query number
         warmup_runs: Number of warmup runs
         measurement_runs: Number of measurement runs
+        pool: Optional ThreadedConnectionPool for concurrent measurement runs
+        executor: Optional ThreadPoolExecutor sized to the pool
+        measure: Measurement mode (see MEASURE_MODES)
+        prepare: PREPARE the query once and EXECUTE it on every run, so
+            parsing and planning stay out of the timed loop
+        cache_mode: Cache state for measurement runs (see CACHE_MODES);
+            cold and mixed runs are always serial
+        rng: Random generator for mixed cache mode (default: module random)
+        raw_file: Open text file receiving each raw timing (ms) as an NDJSON
+            line as it is measured; raw_timings is then left out of the stats
+        evict_command: Shell command evicting the database host's caches
+            (default: drop the local OS page cache, see drop_caches())
     
     Returns:
         Dictionary with benchmark results
     """
-    print(f"  Running {warmup_runs} warmup runs...", end=" ", flush=True)
+    statement = None
+    prepared_conns = []
+    if prepare:
+        # Prepared statements are per connection: prepare on every pooled one too
+        statement = f"bench_{query_num}"
+        prepared_conns.append(conn)
+        if pool is not None and executor is not None:
+            pooled = [pool.getconn() for _ in range(pool.maxconn)]
+            for pooled_conn in pooled:
+                pool.putconn(pooled_conn)
+            prepared_conns.extend(pooled)
+        for prepared_conn in prepared_conns:
+            prepare_statement(prepared_conn, statement, query, measure)
     
-    # Warmup runs (discard results)
-    for _ in range(warmup_runs):
-        execute_query_timing(conn, query)
+    # One cursor serves every warmup and serial measurement run
+    cur = conn.cursor()
     
-    print("Done")
-    print(f"  Running {measurement_runs} measurement runs...", end=" ", flush=True)
+    try:
+        # One untimed priming run, so even the first warmup sees a populated
+        # plan cache and initialized result conversion
+        execute_query_timing(cur, query, measure, statement)
+        
+        print(f"  Running {warmup_runs} warmup runs...", end=" ", flush=True)
+        
+        # Warmup runs (discard results), batched into one round trip
+        run_warmups(cur, query, warmup_runs, measure, statement)
+        
+        print("Done")
+        print(f"  Running {measurement_runs} measurement runs...", end=" ", flush=True)
+        
+        # Measurement runs
+        run_cache_modes = None
+        planning_times = [] if measure == "explain_analyze" else None
+        if pool is not None and executor is not None and cache_mode == "warm":
+            timings = list(executor.map(
+                lambda _: execute_pooled_query_timing(pool, query, measure, statement,
+                                                      planning_times),
+                range(measurement_runs)
+            ))
+            if raw_file is not None:
+                raw_file.writelines(f"{timing / 1e6}\n" for timing in timings)
+        else:
+            timings = []
+            run_cache_modes = []
+            for _ in range(measurement_runs):
+                # Cache eviction happens outside the timed section; a run only
+                # counts as cold if the eviction actually ran
+                cold = cache_mode == "cold" or (
+                    cache_mode == "mixed" and (rng or random).random() < 0.5
+                )
+                cold = cold and drop_caches(evict_command)
+                run_cache_modes.append("cold" if cold else "warm")
+                
+                timing = execute_query_timing(cur, query, measure, statement, planning_times)
+                timings.append(timing)
+                if raw_file is not None:
+                    raw_file.write(f"{timing / 1e6}\n")
+        
+        # Progress marks (one per 5 runs) are written once the runs are over,
+        # so no terminal write or flush happens between timed runs
+        print("." * (measurement_runs // 5) + " Done")
+    finally:
+        cur.close()
+        for prepared_conn in prepared_conns:
+            deallocate_statement(prepared_conn, statement)
+    
+    return latency_statistics(
+        timings, measurement_runs, run_cache_modes if cache_mode != "warm" else None,
+        include_raw=raw_file is None, planning_timings_ns=planning_times
+    )
+
+
+def _summarize(timings) -> Dict[str, Any]:
+    """
+    Summary statistics of a set of timings, with vectorized passes over one array.
     
-    # Measurement runs
-    timings = []
-    for i in range(measurement_runs):
-        timing = execute_query_timing(conn, query)
-        timings.append(timing)
-        if (i + 1) % 5 == 0:
-            print(".", end="", flush=True)
+    Percentiles use the nearest-rank index min(int(p/100 * n), n - 1); the
+    median averages the two middle values for an even count.
+    
+    Args:
+        timings: Timings in milliseconds (sequence or numpy array)
+    
+    Returns:
+        Dictionary with min, max, mean, median, p50, p95, p99 and stddev
+        (None for an empty input, stddev 0.0)
+    """
+    arr = np.asarray(timings, dtype=np.float64)
+    n = arr.size
+    
+    if not n:
+        return {
+            "min": None,
+            "max": None,
+            "mean": None,
+            "median": None,
+            "p50": None,
+            "p95": None,
+            "p99": None,
+            "stddev": 0.0,
+        }
+    
+    # One partition places every order statistic we report: min, max, the
+    # middle element(s) for the median and both percentiles
+    p95_index = min(int(0.95 * n), n - 1)
+    p99_index = min(int(0.99 * n), n - 1)
+    low_mid, high_mid = (n - 1) // 2, n // 2
+    partitioned = np.partition(
+        arr, sorted({0, low_mid, high_mid, p95_index, p99_index, n - 1})
+    )
+    median = float((partitioned[low_mid] + partitioned[high_mid]) / 2)
+    
+    # Mean and sample standard deviation from one shared deviation array
+    mean = float(arr.mean())
+    deviations = arr - mean
+    stddev = float(np.sqrt(deviations @ deviations / (n - 1))) if n > 1 else 0.0
+    
+    return {
+        "min": float(partitioned[0]),
+        "max": float(partitioned[n - 1]),
+        "mean": mean,
+        "median": median,
+        "p50": median,  # p50 is the median
+        "p95": float(partitioned[p95_index]),
+        "p99": float(partitioned[p99_index]),
+        "stddev": stddev,
+    }
+
+
+def latency_statistics(timings_ns: List[int], measurement_runs: int,
+                       run_cache_modes: Optional[List[str]] = None,
+                       include_raw: bool = True,
+                       planning_timings_ns: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Summarize the measurement runs of one query.
     
-    print(" Done")
+    Timings are measured in integer nanoseconds and converted to
+    milliseconds once, here; all reported values are in milliseconds.
     
-    # Calculate statistics
-    timings_sorted = sorted(timings)
-    n = len(timings_sorted)
+    Args:
+        timings_ns: Measured latencies in nanoseconds
+        measurement_runs: Number of measurement runs requested
+        run_cache_modes: Cache state of each run, stored when given
+        include_raw: Store the raw timings under "raw_timings"
+        planning_timings_ns: Server planning times in nanoseconds, summarized
+            under "planning" when given
     
-    # Calculate percentiles (using nearest-rank method)
-    def percentile(sorted_list, p):
-        """Calculate percentile using nearest-rank method."""
-        if not sorted_list:
-            return None
-        index = int((p / 100.0) * len(sorted_list))
-        # Ensure index is within bounds
-        index = min(index, len(sorted_list) - 1)
-        return sorted_list[index]
+    Returns:
+        Dictionary with benchmark results
+    """
+    arr = np.asarray(timings_ns, dtype=np.int64) / 1e6
     
     stats = {
         "runs": measurement_runs,
-        "raw_timings": timings,  # Store all raw timings
-        "min": min(timings) if timings else None,
-        "max": max(timings) if timings else None,
-        "mean": statistics.mean(timings) if timings else None,
-        "median": statistics.median(timings) if timings else None,
-        "p50": statistics.median(timings) if timings else None,  # p50 is the median
-        "p95": percentile(timings_sorted, 95),
-        "p99": percentile(timings_sorted, 99),
-        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "raw_timings": arr,  # Store all raw timings (serialized by save_results_json)
+        **_summarize(arr),
     }
     
+    if not include_raw:
+        # Raw timings were streamed elsewhere
+        del stats["raw_timings"]
+    
+    if run_cache_modes is not None:
+        # Cache state of each run, parallel to raw_timings
+        stats["run_cache_modes"] = run_cache_modes
+    
+    if planning_timings_ns is not None:
+        # Parse/plan cost, kept apart from the execution-time statistics above
+        stats["planning"] = _summarize(np.asarray(planning_timings_ns, dtype=np.int64) / 1e6)
+    
     return stats
 
 
-def save_results_json(results: Dict[str, Any], output_file: Path):
-    """Save benchmark results to JSON file."""
-    output_file.parent.mkdir(parents=True, exist_ok=True)
+def run_scheduled_benchmarks(conn, queries: List[Tuple[int, str, str]], warmup_runs: int,
+                             measurement_runs: int, schedule: str, rng: random.Random,
+                             measure: str = DEFAULT_MEASURE_MODE, prepare: bool = False,
+                             cache_mode: str = DEFAULT_CACHE_MODE,
+                             raw_files: Optional[List[Any]] = None,
+                             evict_command: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Run the measurement runs of all queries in an interleaved or random order.
+    
+    Warmup runs for every query happen first. Measurement runs are then
+    executed serially in schedule order, so no query always runs right
+    after its own previous iteration.
+    
+    Args:
+        conn: Database connection
+        queries: Parsed queries (query_number, description, sql_query)
+        warmup_runs: Number of warmup runs per query
+        measurement_runs: Number of measurement runs per query
+        schedule: "interleaved" or "random" (see SCHEDULES)
+        rng: Seeded random generator for the random schedule and mixed cache mode
+        measure: Measurement mode (see MEASURE_MODES)
+        prepare: Use server-side prepared statements
+        cache_mode: Cache state for measurement runs (see CACHE_MODES)
+        raw_files: Open text files, one per query, receiving each raw timing
+            (ms) as an NDJSON line; raw_timings is then left out of the stats
+        evict_command: Shell command evicting the database host's caches
+    
+    Returns:
+        List of statistics dictionaries, in query order
+    """
+    if schedule == "random":
+        run_order = [(qi, run) for qi in range(len(queries)) for run in range(measurement_runs)]
+        rng.shuffle(run_order)
+    else:
+        run_order = [(qi, run) for run in range(measurement_runs) for qi in range(len(queries))]
+    
+    statements = [f"bench_{query_num}" if prepare else None for query_num, _, _ in queries]
+    per_query_timings = [[] for _ in queries]
+    per_query_cache_modes = [[] for _ in queries]
+    per_query_planning = [[] if measure == "explain_analyze" else None for _ in queries]
+    
+    cur = conn.cursor()
+    try:
+        for (query_num, _, sql_query), statement in zip(queries, statements):
+            if statement is not None:
+                prepare_statement(conn, statement, sql_query, measure)
+        
+        print(f"Running {warmup_runs} warmup runs per query...", end=" ", flush=True)
+        for (_, _, sql_query), statement in zip(queries, statements):
+            # Untimed priming run in front of the warmups, as in run_benchmark()
+            execute_query_timing(cur, sql_query, measure, statement)
+            run_warmups(cur, sql_query, warmup_runs, measure, statement)
+        print("Done")
+        
+        print(f"Running {len(run_order)} measurement runs ({schedule} order)...",
+              end=" ", flush=True)
+        for qi, _ in run_order:
+            # Cache eviction happens outside the timed section; a run only
+            # counts as cold if the eviction actually ran
+            cold = cache_mode == "cold" or (cache_mode == "mixed" and rng.random() < 0.5)
+            cold = cold and drop_caches(evict_command)
+            per_query_cache_modes[qi].append("cold" if cold else "warm")
+            
+            timing = execute_query_timing(cur, queries[qi][2], measure, statements[qi],
+                                          per_query_planning[qi])
+            per_query_timings[qi].append(timing)
+            if raw_files is not None:
+                raw_files[qi].write(f"{timing / 1e6}\n")
+        # One progress mark per 50 runs, written after the timed loop
+        print("." * (len(run_order) // 50) + " Done")
+        print()
+    finally:
+        cur.close()
+        for statement in statements:
+            if statement is not None:
+                deallocate_statement(conn, statement)
+    
+    return [
+        latency_statistics(timings, measurement_runs, cache_modes if cache_mode != "warm" else None,
+                           include_raw=raw_files is None, planning_timings_ns=planning)
+        for timings, cache_modes, planning in zip(per_query_timings, per_query_cache_modes,
+                                                  per_query_planning)
+    ]
+
+
+async def _asyncpg_create_pool(size: int, plan_cache_mode: str = DEFAULT_PLAN_CACHE_MODE):
+    """Open an asyncpg pool of `size` connections with the benchmark settings."""
+    return await asyncpg.create_pool(
+        host=DEFAULT_CONFIG["host"],
+        port=int(DEFAULT_CONFIG["port"]),
+        database=DEFAULT_CONFIG["database"],
+        user=DEFAULT_CONFIG["user"],
+        password=DEFAULT_CONFIG["password"],
+        min_size=max(1, size),
+        max_size=max(1, size),
+        server_settings={
+            "application_name": CONNECTION_OPTIONS["application_name"],
+            "plan_cache_mode": PLAN_CACHE_MODES[plan_cache_mode],
+        },
+    )
+
+
+async def _asyncpg_measure_query(pool, query: str, warmup_runs: int, measurement_runs: int,
+                                 measure_workers: int) -> List[int]:
+    """
+    Warm up and time one query on an asyncpg pool.
+    
+    Args:
+        pool: asyncpg connection pool
+        query: SQL query to execute
+        warmup_runs: Number of warmup runs
+        measurement_runs: Number of measurement runs
+        measure_workers: Run measurement runs concurrently when above 1
+    
+    Returns:
+        Measured latencies in integer nanoseconds
+    """
+    async with pool.acquire() as conn:
+        # Untimed priming run plus warmups, as with psycopg2
+        for _ in range(warmup_runs + 1):
+            await conn.fetch(query)
+        
+        if measure_workers <= 1:
+            timings = []
+            for _ in range(measurement_runs):
+                t0 = time.perf_counter_ns()
+                await conn.fetch(query)
+                timings.append(time.perf_counter_ns() - t0)
+            return timings
+    
+    async def timed_run():
+        async with pool.acquire() as conn:
+            t0 = time.perf_counter_ns()
+            await conn.fetch(query)
+            return time.perf_counter_ns() - t0
+    
+    # The pool size bounds how many runs are in flight at once
+    return list(await asyncio.gather(*(timed_run() for _ in range(measurement_runs))))
+
+
+async def _asyncpg_measure_all(queries: List[Tuple[int, str, str]], warmup_runs: int,
+                               measurement_runs: int, measure: str,
+                               measure_workers: int,
+                               plan_cache_mode: str) -> List[List[int]]:
+    """Time every query on one asyncpg pool (see measure_queries_asyncpg)."""
+    pool = await _asyncpg_create_pool(measure_workers, plan_cache_mode)
+    try:
+        all_timings = []
+        for query_num, _, sql_query in queries:
+            if measure == "count":
+                sql_query = f"SELECT count(*) FROM ({sql_query}) _"
+            print(f"  Query {query_num}...", end=" ", flush=True)
+            all_timings.append(await _asyncpg_measure_query(
+                pool, sql_query, warmup_runs, measurement_runs, measure_workers
+            ))
+            print("Done")
+        return all_timings
+    finally:
+        await pool.close()
+
+
+def measure_queries_asyncpg(queries: List[Tuple[int, str, str]], warmup_runs: int,
+                            measurement_runs: int, measure: str = DEFAULT_MEASURE_MODE,
+                            measure_workers: int = DEFAULT_MEASURE_WORKERS,
+                            plan_cache_mode: str = DEFAULT_PLAN_CACHE_MODE) -> List[List[int]]:
+    """
+    Run warmup and measurement runs for every query with asyncpg.
+    
+    Args:
+        queries: Parsed queries (query_number, description, sql_query)
+        warmup_runs: Number of warmup runs per query
+        measurement_runs: Number of measurement runs per query
+        measure: Measurement mode, fetchall or count
+        measure_workers: Pool size; runs are gathered concurrently when above 1
+        plan_cache_mode: Session plan cache mode (see PLAN_CACHE_MODES)
+    
+    Returns:
+        List of measured latencies in nanoseconds per query, in query order
+    """
+    try:
+        return asyncio.run(_asyncpg_measure_all(
+            queries, warmup_runs, measurement_runs, measure, measure_workers, plan_cache_mode
+        ))
+    except (OSError, asyncpg.PostgresError) as e:
+        print(f"Error connecting to database: {e}")
+        print("\nMake sure PostgreSQL is running and check your environment variables:")
+        print("  DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD")
+        sys.exit(1)
+
+
+def _numpy_to_json(value):
+    """json.dump() fallback for numpy arrays and scalars."""
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def save_results_json(results: Dict[str, Any], output_file: Path, raw_sidecar: bool = False):
+    """
+    Save benchmark results to JSON file.
     
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    Args:
+        results: Results structure with "metadata" and "queries"
+        output_file: Path of the JSON file
+        raw_sidecar: Move every query's raw_timings into a compressed .npz
+            next to the JSON (arrays q<query_number>) so the JSON only holds
+            summary statistics
+    """
+    if raw_sidecar:
+        sidecar_file = output_file.with_suffix(".npz")
+        raw_arrays = {}
+        queries = []
+        for query_result in results["queries"]:
+            stats = dict(query_result["statistics"])
+            raw_arrays[f"q{query_result['query_number']}"] = np.asarray(
+                stats.pop("raw_timings", []), dtype=np.float64
+            )
+            queries.append({**query_result, "statistics": stats})
+        np.savez_compressed(sidecar_file, **raw_arrays)
+        results = {
+            "metadata": {**results["metadata"], "raw_timings_file": sidecar_file.name},
+            "queries": queries,
+        }
+        print(f"  Raw timings saved to: {sidecar_file}")
+    
+    if orjson is not None:
+        # orjson serializes straight to UTF-8 bytes, numpy timing arrays included
+        with open(output_file, "wb") as f:
+            f.write(orjson.dumps(
+                results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            ))
+    else:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False, default=_numpy_to_json)
     
     print(f"  Results saved to: {output_file}")
 
 
-def save_results_csv(results: Dict[str, Any], output_file: Path):
-    """Save benchmark results summary to CSV file."""
-    output_file.parent.mkdir(parents=True, exist_ok=True)
+def new_query_columns() -> Dict[str, Any]:
+    """
+    Create an empty columnar store for per-query latency results.
+    
+    Every field is one list, indexed by query position; the summary
+    statistics written to the CSV also get one list each under "stats".
+    
+    Returns:
+        Dictionary of field name to list
+    """
+    return {
+        "query_number": [],
+        "description": [],
+        "query": [],
+        "statistics": [],
+        "stats": {key: [] for key in ("runs",) + CSV_STAT_KEYS},
+    }
+
+
+def append_query_result(columns: Dict[str, Any], query_num: int, description: str,
+                        query: str, stats: Dict[str, Any]):
+    """Append one query's results to a columnar store from new_query_columns()."""
+    columns["query_number"].append(query_num)
+    columns["description"].append(description)
+    columns["query"].append(query)
+    columns["statistics"].append(stats)
+    for key, column in columns["stats"].items():
+        column.append(stats[key])
+
+
+def query_columns_to_dicts(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Row view of a columnar store, in the "queries" layout of the results JSON.
+    
+    Args:
+        columns: Columnar store from new_query_columns()
+    
+    Returns:
+        List of per-query dictionaries
+    """
+    return [
+        {
+            "query_number": query_num,
+            "description": description,
+            "query": query,
+            "statistics": stats,
+        }
+        for query_num, description, query, stats in zip(
+            columns["query_number"], columns["description"],
+            columns["query"], columns["statistics"],
+        )
+    ]
+
+
+def save_results_csv(columns: Dict[str, Any], output_file: Path):
+    """
+    Save benchmark results summary to CSV file.
     
+    Args:
+        columns: Columnar store from new_query_columns()
+        output_file: Path of the CSV file
+    """
     with open(output_file, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         
@@ -202,29 +1074,36 @@ def save_results_csv(results: Dict[str, Any], output_file: Path):
             "mean_ms", "median_ms", "p50_ms", "p95_ms", "p99_ms", "stddev_ms"
         ])
         
-        # Data rows
-        for query_result in results["queries"]:
-            stats = query_result["statistics"]
-            writer.writerow([
-                query_result["query_number"],
-                query_result["description"],
-                stats["runs"],
-                f"{stats['min']:.2f}",
-                f"{stats['max']:.2f}",
-                f"{stats['mean']:.2f}",
-                f"{stats['median']:.2f}",
-                f"{stats['p50']:.2f}",
-                f"{stats['p95']:.2f}",
-                f"{stats['p99']:.2f}",
-                f"{stats['stddev']:.2f}",
-            ])
+        # Data rows: each statistics column is formatted as a whole, then the
+        # columns are zipped into rows and written in one batch. Statistics of
+        # a query without timings are None and become empty cells.
+        stats = columns["stats"]
+        formatted = [
+            ["" if value is None else f"{value:.2f}" for value in stats[key]]
+            for key in CSV_STAT_KEYS
+        ]
+        writer.writerows(zip(
+            columns["query_number"], columns["description"], stats["runs"], *formatted
+        ))
     
     print(f"  Summary CSV saved to: {output_file}")
 
 
 def run_benchmarks(scale: str = "small", index_config: str = "no_index", 
                    warmup_runs: int = DEFAULT_WARMUP_RUNS, 
-                   measurement_runs: int = DEFAULT_MEASUREMENT_RUNS):
+                   measurement_runs: int = DEFAULT_MEASUREMENT_RUNS,
+                   measure_workers: int = DEFAULT_MEASURE_WORKERS,
+                   measure: str = DEFAULT_MEASURE_MODE,
+                   prepare: bool = False,
+                   cache_mode: str = DEFAULT_CACHE_MODE,
+                   raw_sidecar: bool = False,
+                   schedule: str = DEFAULT_SCHEDULE,
+                   seed: Optional[int] = None,
+                   raw_ndjson: bool = False,
+                   driver: str = DEFAULT_DRIVER,
+                   raw_values: bool = False,
+                   plan_cache_mode: str = DEFAULT_PLAN_CACHE_MODE,
+                   evict_command: Optional[str] = None):
     """
     Run benchmarks for all queries.
     
@@ -233,12 +1112,68 @@ def run_benchmarks(scale: str = "small", index_config: str = "no_index",
         index_config: Index configuration (no_index, with_index)
         warmup_runs: Number of warmup runs per query
         measurement_runs: Number of measurement runs per query
+        measure_workers: Connections used for concurrent measurement runs
+            (1 keeps the serial, unperturbed latency measurement)
+        measure: Measurement mode (see MEASURE_MODES)
+        prepare: Use server-side prepared statements for warmup and measurement runs
+        cache_mode: Cache state for measurement runs (see CACHE_MODES)
+        raw_sidecar: Store raw timings in a compressed .npz next to the JSON
+        schedule: Order of measurement runs across queries (see SCHEDULES)
+        seed: Seed for the random schedule and mixed cache mode
+        raw_ndjson: Stream raw timings to one NDJSON file per query while
+            measuring instead of keeping them in the results JSON
+        driver: Client library for latency runs (see DRIVERS)
+        raw_values: Skip psycopg2's Python object construction for numeric
+            and date/time columns (see RAW_VALUE_OIDS)
+        plan_cache_mode: Session plan cache mode (see PLAN_CACHE_MODES)
+        evict_command: Shell command evicting the database host's caches for
+            cold runs (required unless the database runs on this machine)
     """
     queries_file = SQL_DIR / "queries.sql"
+    rng = random.Random(seed)
+    
+    if driver == "asyncpg":
+        if asyncpg is None:
+            print("Error: --driver asyncpg requires the asyncpg package (pip install asyncpg)")
+            return False
+        if (measure not in ("fetchall", "count") or prepare or cache_mode != "warm"
+                or schedule != "sequential"):
+            print("Error: --driver asyncpg supports only --measure fetchall/count, the warm cache "
+                  "mode and the sequential schedule (asyncpg prepares statements itself)")
+            return False
+        if raw_values:
+            print("Error: --raw-values applies to psycopg2 only "
+                  "(asyncpg decodes binary values itself)")
+            return False
+    if measure == "copy" and prepare:
+        print("Error: --measure copy cannot be combined with --prepare "
+              "(COPY cannot EXECUTE a prepared statement)")
+        return False
+    if cache_mode != "warm" and evict_command is None and not database_is_local():
+        # Dropping this machine's page cache would leave the database's caches warm
+        print(f"Error: --cache-mode {cache_mode} with a remote database "
+              f"({DEFAULT_CONFIG['host']}) needs --evict-command to evict its caches")
+        return False
     
     print(f"Running benchmarks ({index_config} configuration, {scale} dataset)...")
     print(f"Database: {DEFAULT_CONFIG['database']} @ {DEFAULT_CONFIG['host']}:{DEFAULT_CONFIG['port']}")
     print(f"Warmup runs: {warmup_runs}, Measurement runs: {measurement_runs}")
+    print(f"Driver: {driver}" + (" (raw values)" if raw_values else ""))
+    print(f"Measure mode: {measure}" + (" (prepared statements)" if prepare else ""))
+    print(f"Plan cache mode: {PLAN_CACHE_MODES[plan_cache_mode]}")
+    print(f"Cache mode: {cache_mode}"
+          + (f" (evict: {evict_command})" if cache_mode != "warm" and evict_command else ""))
+    print(f"Schedule: {schedule}" + (f" (seed {seed})" if seed is not None else ""))
+    if measure_workers > 1 and cache_mode != "warm":
+        # Evicting caches between concurrent runs is meaningless
+        print(f"Note: --measure-workers ignored in {cache_mode} cache mode, runs are serial")
+        measure_workers = 1
+    if measure_workers > 1 and schedule != "sequential":
+        print(f"Note: --measure-workers ignored with the {schedule} schedule, runs are serial")
+        measure_workers = 1
+    if measure_workers > 1:
+        print(f"Measurement workers: {measure_workers} "
+              "(concurrent runs, latencies include contention)")
     print()
     
     # Parse queries
@@ -247,29 +1182,78 @@ def run_benchmarks(scale: str = "small", index_config: str = "no_index",
     print()
     
     # Connect to database
-    conn = get_db_connection()
+    conn = get_db_connection(raw_values, plan_cache_mode)
+    prime_connection(conn)
+    
+    # Pool and executor for concurrent measurement runs, shared by all queries
+    pool = None
+    executor = None
+    if measure_workers > 1 and driver == "psycopg2":
+        pool = create_connection_pool(measure_workers, raw_values, plan_cache_mode)
+        executor = ThreadPoolExecutor(max_workers=measure_workers)
     
     try:
-        query_results = []
+        query_columns = new_query_columns()
         total_start_time = time.perf_counter()
         
-        for query_num, description, sql_query in queries:
+        raw_pattern = f"raw_{index_config}_{scale}_q{{query_number}}.ndjson"
+        
+        def open_raw_file(query_num):
+            return open(RESULTS_DIR / raw_pattern.format(query_number=query_num),
+                        "w", encoding="utf-8")
+        
+        scheduled_stats = None
+        if driver == "asyncpg":
+            # Measured up front on an asyncpg pool, reported per query below
+            print(f"Running warmup and measurement runs with asyncpg...")
+            all_timings = measure_queries_asyncpg(
+                queries, warmup_runs, measurement_runs, measure=measure,
+                measure_workers=measure_workers, plan_cache_mode=plan_cache_mode
+            )
+            print()
+            scheduled_stats = []
+            for (query_num, _, _), timings in zip(queries, all_timings):
+                if raw_ndjson:
+                    with open_raw_file(query_num) as raw_file:
+                        raw_file.writelines(f"{timing / 1e6}\n" for timing in timings)
+                scheduled_stats.append(
+                    latency_statistics(timings, measurement_runs, include_raw=not raw_ndjson)
+                )
+        elif schedule != "sequential":
+            raw_files = [open_raw_file(query[0]) for query in queries] if raw_ndjson else None
+            try:
+                scheduled_stats = run_scheduled_benchmarks(
+                    conn, queries, warmup_runs, measurement_runs, schedule, rng,
+                    measure=measure, prepare=prepare, cache_mode=cache_mode,
+                    raw_files=raw_files, evict_command=evict_command
+                )
+            finally:
+                for raw_file in raw_files or []:
+                    raw_file.close()
+        
+        for qi, (query_num, description, sql_query) in enumerate(queries):
             print(f"Query {query_num}: {description}")
             
-            # Run benchmark
-            stats = run_benchmark(conn, sql_query, query_num, warmup_runs, measurement_runs)
+            # Run benchmark (or take the interleaved results)
+            if scheduled_stats is not None:
+                stats = scheduled_stats[qi]
+            else:
+                raw_file = open_raw_file(query_num) if raw_ndjson else None
+                try:
+                    stats = run_benchmark(conn, sql_query, query_num, warmup_runs, measurement_runs,
+                                          pool=pool, executor=executor, measure=measure,
+                                          prepare=prepare, cache_mode=cache_mode, rng=rng,
+                                          raw_file=raw_file, evict_command=evict_command)
+                finally:
+                    if raw_file is not None:
+                        raw_file.close()
             
             # Display summary
             print(f"  Results: min={stats['min']:.2f}ms, mean={stats['mean']:.2f}ms, "
                   f"p50={stats['p50']:.2f}ms, p95={stats['p95']:.2f}ms, max={stats['max']:.2f}ms")
             print()
             
-            query_results.append({
-                "query_number": query_num,
-                "description": description,
-                "query": sql_query,
-                "statistics": stats
-            })
+            append_query_result(query_columns, query_num, description, sql_query, stats)
         
         total_end_time = time.perf_counter()
         total_duration = total_end_time - total_start_time
@@ -281,6 +1265,17 @@ def run_benchmarks(scale: str = "small", index_config: str = "no_index",
                 "index_configuration": index_config,
                 "warmup_runs": warmup_runs,
                 "measurement_runs": measurement_runs,
+                "measure_workers": measure_workers,
+                "measure_mode": measure,
+                "prepared_statements": prepare,
+                "raw_values": raw_values,
+                "plan_cache_mode": PLAN_CACHE_MODES[plan_cache_mode],
+                "cache_mode": cache_mode,
+                "evict_command": evict_command,
+                "schedule": schedule,
+                "seed": seed,
+                "raw_timings_files": raw_pattern if raw_ndjson else None,
+                "driver": driver,
                 "database": DEFAULT_CONFIG["database"],
                 "host": DEFAULT_CONFIG["host"],
                 "port": DEFAULT_CONFIG["port"],
@@ -288,18 +1283,18 @@ def run_benchmarks(scale: str = "small", index_config: str = "no_index",
                 "total_duration_seconds": total_duration,
                 "captured_at": datetime.now().isoformat(),
             },
-            "queries": query_results
+            "queries": query_columns_to_dicts(query_columns)
         }
         
         # Save results
         output_filename = f"latency_{index_config}_{scale}.json"
         output_file = RESULTS_DIR / output_filename
-        save_results_json(results, output_file)
+        save_results_json(results, output_file, raw_sidecar=raw_sidecar)
         
         # Also save CSV summary
         csv_filename = f"latency_{index_config}_{scale}.csv"
         csv_file = RESULTS_DIR / csv_filename
-        save_results_csv(results, csv_file)
+        save_results_csv(query_columns, csv_file)
         
         # Summary
         print("=" * 60)
@@ -312,46 +1307,426 @@ def run_benchmarks(scale: str = "small", index_config: str = "no_index",
         return True
         
     finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if pool is not None:
+            pool.closeall()
         conn.close()
 
 
-def worker_execute_query(query: str, worker_id: int) -> Tuple[int, float, bool]:
+def dry_run(index_config: str = "no_index") -> bool:
     """
-    Worker function to execute a query in a separate thread.
-    Each worker has its own database connection.
+    Check that every query parses and plans, without timing or saving anything.
+    
+    Plans come from _cached_explain(), an lru_cache keyed on the query text
+    that is created for this run and closed over its cursor, so duplicated
+    queries reach the server only once and nothing outlives the run.
+    Warmup and measurement runs never use it.
     
     Args:
-        query: SQL query to execute
-        worker_id: Worker identifier
+        index_config: Index configuration (only shown in the header)
     
     Returns:
-        Tuple of (worker_id, execution_time_ms, success)
+        True if every query could be planned
     """
-    conn = None
+    queries_file = SQL_DIR / "queries.sql"
+    
+    print(f"Dry run ({index_config} configuration): planning queries without executing them")
+    print(f"Database: {DEFAULT_CONFIG['database']} @ "
+          f"{DEFAULT_CONFIG['host']}:{DEFAULT_CONFIG['port']}")
+    print()
+    
+    queries = parse_queries(queries_file)
+    print(f"Found {len(queries)} queries to check")
+    print()
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    @lru_cache(maxsize=256)
+    def _cached_explain(sql_query: str) -> Dict[str, Any]:
+        """Top-level plan node of EXPLAIN (FORMAT JSON), cached by query text."""
+        cur.execute(f"EXPLAIN (FORMAT JSON) {sql_query}")
+        plan = cur.fetchone()[0]
+        if isinstance(plan, list):
+            plan = plan[0]
+        return plan["Plan"]
+    
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+        failed = 0
+        for query_num, description, sql_query in queries:
+            print(f"Query {query_num}: {description}")
+            try:
+                plan = _cached_explain(sql_query)
+            except psycopg2.Error as e:
+                # Failed plans are not cached (lru_cache skips raised calls)
+                print(f"  Error: {str(e).strip()}")
+                conn.rollback()
+                failed += 1
+                continue
+            print(f"  Plan OK: {plan['Node Type']}, estimated cost {plan['Total Cost']:.2f}, "
+                  f"rows {plan['Plan Rows']}")
+        
+        print()
+        print("=" * 60)
+        print(f"Dry run complete: {len(queries) - failed} planned, {failed} failed")
+        print(f"  Plans served from cache (duplicate query text): "
+              f"{_cached_explain.cache_info().hits}")
         
-        t0 = time.perf_counter()
-        cur.execute(query)
-        cur.fetchall()  # Fetch all results
-        t1 = time.perf_counter()
+        return failed == 0
         
+    finally:
         cur.close()
-        execution_time = (t1 - t0) * 1000  # Convert to milliseconds
+        conn.close()
+
+
+def worker_execute_query(query: str, worker_id: int, worker_local,
+                         measure: str = DEFAULT_MEASURE_MODE,
+                         statement: Optional[str] = None) -> Tuple[int, int, bool]:
+    """
+    Worker function to execute a query in a separate thread.
+    Each worker thread reuses the pooled connection and cursor it acquired
+    when it started (see run_throughput_benchmark), so no connection is
+    opened per query.
+    
+    Args:
+        query: SQL query to execute
+        worker_id: Worker identifier
+        worker_local: threading.local() holding the thread's cursor as .cur
+        measure: Measurement mode (see MEASURE_MODES)
+        statement: Name of the statement prepared on the worker's connection
+    
+    Returns:
+        Tuple of (worker_id, execution_time_ns, success)
+    """
+    try:
+        execution_time = execute_query_timing(worker_local.cur, query, measure, statement)
         return (worker_id, execution_time, True)
         
     except Exception as e:
         print(f"  Worker {worker_id} error: {e}")
-        return (worker_id, 0.0, False)
+        return (worker_id, 0, False)
+
+
+def worker_run_until(query: str, worker_id: int, worker_local, end_time: float,
+                     measure: str = DEFAULT_MEASURE_MODE,
+                     statement: Optional[str] = None) -> Tuple[List[int], int]:
+    """
+    Run a query back to back on one worker thread until end_time.
+    
+    Each worker is submitted once and loops on its own, so the main thread
+    never dispatches or polls individual query runs.
+    
+    Args:
+        query: SQL query to execute
+        worker_id: Worker identifier
+        worker_local: threading.local() holding the thread's connection as
+            .conn and cursor as .cur
+        end_time: time.perf_counter() deadline after which no new run starts
+        measure: Measurement mode (see MEASURE_MODES)
+        statement: Name to PREPARE the query under on the worker's connection
+            for the duration of this call, or None to send the query text
+    
+    Returns:
+        Tuple of (execution_times_ns, failed_runs)
+    """
+    execution_times = []
+    failed = 0
+    
+    if statement is not None:
+        # Prepared statements are per connection, so every worker prepares its own
+        prepare_statement(worker_local.conn, statement, query, measure)
+    
+    try:
+        while time.perf_counter() < end_time:
+            _, exec_time, success = worker_execute_query(query, worker_id, worker_local,
+                                                         measure, statement)
+            if success:
+                execution_times.append(exec_time)
+            else:
+                failed += 1
     finally:
-        if conn:
-            conn.close()
+        if statement is not None:
+            deallocate_statement(worker_local.conn, statement)
+    
+    return execution_times, failed
+
+
+def run_throughput_query(executor, worker_local, query_num: int, description: str,
+                         sql_query: str, concurrency: int, duration_seconds: int,
+                         measure: str = DEFAULT_MEASURE_MODE,
+                         statement: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run one query on every worker of a shared executor for a fixed duration.
+    
+    Args:
+        executor: ThreadPoolExecutor whose threads hold a pooled connection
+        worker_local: threading.local() holding each thread's .conn and .cur
+        query_num: Query number
+        description: Query description
+        sql_query: SQL query to execute
+        concurrency: Number of concurrent workers (the executor's size)
+        duration_seconds: Duration of the measurement window in seconds
+        measure: Measurement mode (see MEASURE_MODES)
+        statement: Prepared statement name, or None to send the query text
+    
+    Returns:
+        Query result dictionary with throughput and latency statistics
+    """
+    print(f"Query {query_num}: {description}")
+    print(f"  Running throughput test with {concurrency} workers for {duration_seconds}s...",
+          end=" ", flush=True)
+    
+    # Track query execution statistics
+    failed_queries = 0
+    execution_times = []
+    start_time = time.perf_counter()
+    end_time = start_time + duration_seconds
+    
+    # One self-looping task per worker, results collected once every worker has finished
+    futures = [
+        executor.submit(worker_run_until, sql_query, worker_id, worker_local,
+                        end_time, measure, statement)
+        for worker_id in range(concurrency)
+    ]
+    
+    for future in futures:
+        try:
+            worker_times, worker_failed = future.result()
+            execution_times.extend(worker_times)
+            failed_queries += worker_failed
+        except Exception:
+            failed_queries += 1
+    
+    actual_duration = time.perf_counter() - start_time
+    return throughput_result(query_num, description, sql_query,
+                             execution_times, failed_queries, actual_duration)
+
+
+def sample_timings(timings: np.ndarray, size: int) -> np.ndarray:
+    """
+    Uniform random sample of timings without replacement, in run order.
+    
+    Args:
+        timings: Timings of every completed run
+        size: Maximum sample size
+    
+    Returns:
+        All timings if there are at most `size`, otherwise `size` of them
+    """
+    if timings.size <= size:
+        return timings
+    indices = np.random.default_rng().choice(timings.size, size=size, replace=False)
+    indices.sort()
+    return timings[indices]
+
+
+def throughput_result(query_num: int, description: str, sql_query: str,
+                      execution_times: List[int], failed_queries: int,
+                      actual_duration: float) -> Dict[str, Any]:
+    """
+    Summarize and print one query's throughput window.
+    
+    Args:
+        query_num: Query number
+        description: Query description
+        sql_query: SQL query that was executed
+        execution_times: Latencies of the completed runs in integer nanoseconds
+        failed_queries: Number of failed runs
+        actual_duration: Measured length of the window in seconds
+    
+    Returns:
+        Query result dictionary with throughput and latency statistics
+    """
+    completed_queries = len(execution_times)
+    qps = completed_queries / actual_duration if actual_duration > 0 else 0
+    
+    # Calculate statistics, converting the integer ns timings to ms once
+    timings_ms = np.asarray(execution_times, dtype=np.int64) / 1e6
+    stats = {
+        "total_queries": completed_queries,
+        "failed_queries": failed_queries,
+        "duration_seconds": actual_duration,
+        "qps": qps if execution_times else 0.0,
+        "raw_timings": sample_timings(timings_ms, THROUGHPUT_RAW_SAMPLE),
+        # Full latency distribution; timings outside the edges go to the end buckets
+        "histogram_counts": np.histogram(
+            np.clip(timings_ms, HISTOGRAM_EDGES_MS[0], HISTOGRAM_EDGES_MS[-1]),
+            bins=HISTOGRAM_EDGES_MS
+        )[0],
+        **_summarize(timings_ms),
+    }
+    
+    print(f"Done")
+    print(f"  Completed: {completed_queries} queries, Failed: {failed_queries}")
+    print(f"  QPS: {qps:.2f}, Duration: {actual_duration:.2f}s")
+    if execution_times:
+        print(f"  Latency: mean={stats['mean']:.2f}ms, p50={stats['p50']:.2f}ms, "
+              f"p95={stats['p95']:.2f}ms")
+    print()
+    
+    return {
+        "query_number": query_num,
+        "description": description,
+        "query": sql_query,
+        "statistics": stats
+    }
+
+
+def run_throughput_queries(queries: List[Tuple[int, str, str]], concurrency: int,
+                           duration_seconds: int, measure: str = DEFAULT_MEASURE_MODE,
+                           prepare: bool = False,
+                           raw_values: bool = False,
+                           plan_cache_mode: str = DEFAULT_PLAN_CACHE_MODE) -> List[Dict[str, Any]]:
+    """
+    Run the throughput window of every query on psycopg2 worker threads.
+    
+    Args:
+        queries: Parsed queries (query_number, description, sql_query)
+        concurrency: Number of worker threads and pooled connections
+        duration_seconds: Duration of each query's window in seconds
+        measure: Measurement mode (see MEASURE_MODES)
+        prepare: PREPARE each query once per worker connection
+        raw_values: Return numeric and date/time columns as strings
+        plan_cache_mode: Session plan cache mode (see PLAN_CACHE_MODES)
+    
+    Returns:
+        List of query result dictionaries, in query order
+    """
+    # One pooled connection per worker thread, held for the whole benchmark
+    pool = create_connection_pool(concurrency, raw_values, plan_cache_mode)
+    
+    # Every executor thread takes a connection from the pool when it starts
+    # and keeps it (with one cursor) until the executor shuts down
+    worker_local = threading.local()
+    acquired = []
+    acquired_lock = threading.Lock()
+    
+    def acquire_worker_connection():
+        worker_local.conn = pool.getconn()
+        worker_local.cur = worker_local.conn.cursor()
+        with acquired_lock:
+            acquired.append((worker_local.conn, worker_local.cur))
+    
+    query_results = []
+    
+    # One executor serves every query, so worker threads and their connections
+    # are set up once rather than inside each query's measurement window
+    executor = ThreadPoolExecutor(max_workers=concurrency,
+                                  initializer=acquire_worker_connection)
+    try:
+        # Start all workers up front: the barrier holds each task until
+        # `concurrency` distinct threads are running
+        ready = threading.Barrier(concurrency)
+        list(executor.map(lambda _: ready.wait(), range(concurrency)))
+        
+        for query_num, description, sql_query in queries:
+            query_results.append(run_throughput_query(
+                executor, worker_local, query_num, description, sql_query,
+                concurrency, duration_seconds, measure,
+                f"bench_{query_num}" if prepare else None
+            ))
+    finally:
+        executor.shutdown(wait=True)
+        
+        # Worker threads have exited, hand their connections back
+        for conn, cur in acquired:
+            cur.close()
+            pool.putconn(conn)
+        pool.closeall()
+    
+    return query_results
+
+
+async def _asyncpg_worker_until(pool, query: str, end_time: float) -> Tuple[List[int], int]:
+    """Run a query back to back on one pooled asyncpg connection until end_time."""
+    execution_times = []
+    failed = 0
+    
+    async with pool.acquire() as conn:
+        while time.perf_counter() < end_time:
+            try:
+                t0 = time.perf_counter_ns()
+                await conn.fetch(query)
+                execution_times.append(time.perf_counter_ns() - t0)
+            except asyncpg.PostgresError as e:
+                print(f"  Worker error: {e}")
+                failed += 1
+    
+    return execution_times, failed
+
+
+async def _asyncpg_throughput_all(queries: List[Tuple[int, str, str]], concurrency: int,
+                                  duration_seconds: int, measure: str,
+                                  plan_cache_mode: str) -> List[Dict[str, Any]]:
+    """Run every query's throughput window on one asyncpg pool (see measure_throughput_asyncpg)."""
+    pool = await _asyncpg_create_pool(concurrency, plan_cache_mode)
+    try:
+        query_results = []
+        for query_num, description, sql_query in queries:
+            query = f"SELECT count(*) FROM ({sql_query}) _" if measure == "count" else sql_query
+            print(f"Query {query_num}: {description}")
+            print(f"  Running throughput test with {concurrency} workers "
+                  f"for {duration_seconds}s...", end=" ", flush=True)
+            
+            start_time = time.perf_counter()
+            end_time = start_time + duration_seconds
+            worker_results = await asyncio.gather(
+                *(_asyncpg_worker_until(pool, query, end_time) for _ in range(concurrency))
+            )
+            actual_duration = time.perf_counter() - start_time
+            
+            execution_times = [t for worker_times, _ in worker_results for t in worker_times]
+            failed_queries = sum(failed for _, failed in worker_results)
+            query_results.append(throughput_result(
+                query_num, description, sql_query, execution_times, failed_queries,
+                actual_duration
+            ))
+        return query_results
+    finally:
+        await pool.close()
+
+
+def measure_throughput_asyncpg(queries: List[Tuple[int, str, str]], concurrency: int,
+                               duration_seconds: int,
+                               measure: str = DEFAULT_MEASURE_MODE,
+                               plan_cache_mode: str = DEFAULT_PLAN_CACHE_MODE
+                               ) -> List[Dict[str, Any]]:
+    """
+    Run the throughput window of every query as asyncpg coroutines.
+    
+    All workers share one thread and event loop; each holds one pooled
+    connection and keeps a query in flight until the window closes.
+    
+    Args:
+        queries: Parsed queries (query_number, description, sql_query)
+        concurrency: Number of concurrent coroutines and pooled connections
+        duration_seconds: Duration of each query's window in seconds
+        measure: Measurement mode, fetchall or count
+        plan_cache_mode: Session plan cache mode (see PLAN_CACHE_MODES)
+    
+    Returns:
+        List of query result dictionaries, in query order
+    """
+    try:
+        return asyncio.run(_asyncpg_throughput_all(queries, concurrency, duration_seconds,
+                                                   measure, plan_cache_mode))
+    except (OSError, asyncpg.PostgresError) as e:
+        print(f"Error connecting to database: {e}")
+        print("\nMake sure PostgreSQL is running and check your environment variables:")
+        print("  DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD")
+        sys.exit(1)
 
 
 def run_throughput_benchmark(scale: str = "small", index_config: str = "no_index",
                              concurrency: int = DEFAULT_CONCURRENCY,
-                             duration_seconds: int = DEFAULT_DURATION_SECONDS):
+                             duration_seconds: int = DEFAULT_DURATION_SECONDS,
+                             raw_sidecar: bool = False,
+                             measure: str = DEFAULT_MEASURE_MODE,
+                             prepare: bool = False,
+                             raw_values: bool = False,
+                             driver: str = DEFAULT_DRIVER,
+                             plan_cache_mode: str = DEFAULT_PLAN_CACHE_MODE):
     """
     Run throughput benchmark with concurrent workers.
     
@@ -360,9 +1735,31 @@ def run_throughput_benchmark(scale: str = "small", index_config: str = "no_index
         index_config: Index configuration (no_index, with_index)
         concurrency: Number of concurrent workers (4-16)
         duration_seconds: Duration of the benchmark in seconds (20-60)
+        raw_sidecar: Store raw timings in a compressed .npz next to the JSON
+        measure: Measurement mode for every query run (see MEASURE_MODES)
+        prepare: PREPARE each query once per worker connection and EXECUTE it
+            on every run
+        raw_values: Skip psycopg2's Python object construction for numeric
+            and date/time columns (see RAW_VALUE_OIDS)
+        driver: Client library (see DRIVERS); asyncpg runs every worker as a
+            coroutine on one event loop instead of a thread
+        plan_cache_mode: Session plan cache mode (see PLAN_CACHE_MODES)
     """
     queries_file = SQL_DIR / "queries.sql"
     
+    if driver == "asyncpg":
+        if asyncpg is None:
+            print("Error: --driver asyncpg requires the asyncpg package (pip install asyncpg)")
+            return False
+        if measure not in ("fetchall", "count") or prepare or raw_values:
+            print("Error: --driver asyncpg supports only --measure fetchall/count, without "
+                  "--prepare or --raw-values (asyncpg prepares and decodes statements itself)")
+            return False
+    if measure == "copy" and prepare:
+        print("Error: --measure copy cannot be combined with --prepare "
+              "(COPY cannot EXECUTE a prepared statement)")
+        return False
+    
     # Validate parameters
     if concurrency < 1 or concurrency > 16:
         print(f"Error: Concurrency must be between 1 and 16 (got {concurrency})")
@@ -374,8 +1771,11 @@ def run_throughput_benchmark(scale: str = "small", index_config: str = "no_index
     
     print(f"Running throughput benchmark ({index_config} configuration, {scale} dataset)...")
     print(f"Database: {DEFAULT_CONFIG['database']} @ {DEFAULT_CONFIG['host']}:{DEFAULT_CONFIG['port']}")
+    print(f"Driver: {driver}")
     print(f"Concurrency: {concurrency} workers")
     print(f"Duration: {duration_seconds} seconds")
+    print(f"Measure mode: {measure}" + (" (prepared statements)" if prepare else ""))
+    print(f"Plan cache mode: {PLAN_CACHE_MODES[plan_cache_mode]}")
     print()
     
     # Parse queries
@@ -385,120 +1785,12 @@ def run_throughput_benchmark(scale: str = "small", index_config: str = "no_index
     
     # Use a mix of all queries for throughput testing
     # Round-robin through queries to simulate realistic workload
-    query_results = []
-    
-    for query_num, description, sql_query in queries:
-        print(f"Query {query_num}: {description}")
-        print(f"  Running throughput test with {concurrency} workers for {duration_seconds}s...", end=" ", flush=True)
-        
-        # Track query execution statistics
-        completed_queries = 0
-        failed_queries = 0
-        execution_times = []
-        start_time = time.perf_counter()
-        end_time = start_time + duration_seconds
-        
-        # Use ThreadPoolExecutor for concurrent execution
-        with ThreadPoolExecutor(max_workers=concurrency) as executor:
-            # Submit initial batch of queries
-            futures = []
-            query_counter = 0
-            
-            while time.perf_counter() < end_time:
-                # Submit new queries to maintain concurrency
-                while len(futures) < concurrency and time.perf_counter() < end_time:
-                    future = executor.submit(worker_execute_query, sql_query, query_counter)
-                    futures.append(future)
-                    query_counter += 1
-                
-                # Check for completed queries
-                for future in as_completed(futures[:]):
-                    if time.perf_counter() >= end_time:
-                        break
-                    
-                    try:
-                        worker_id, exec_time, success = future.result(timeout=1.0)
-                        if success:
-                            completed_queries += 1
-                            execution_times.append(exec_time)
-                        else:
-                            failed_queries += 1
-                    except Exception as e:
-                        failed_queries += 1
-                    
-                    futures.remove(future)
-            
-            # Wait for remaining queries to complete (with timeout)
-            for future in futures:
-                try:
-                    worker_id, exec_time, success = future.result(timeout=5.0)
-                    if success:
-                        completed_queries += 1
-                        execution_times.append(exec_time)
-                    else:
-                        failed_queries += 1
-                except Exception:
-                    failed_queries += 1
-        
-        actual_duration = time.perf_counter() - start_time
-        qps = completed_queries / actual_duration if actual_duration > 0 else 0
-        
-        # Calculate statistics
-        if execution_times:
-            timings_sorted = sorted(execution_times)
-            
-            def percentile(sorted_list, p):
-                if not sorted_list:
-                    return None
-                index = int((p / 100.0) * len(sorted_list))
-                index = min(index, len(sorted_list) - 1)
-                return sorted_list[index]
-            
-            stats = {
-                "total_queries": completed_queries,
-                "failed_queries": failed_queries,
-                "duration_seconds": actual_duration,
-                "qps": qps,
-                "raw_timings": execution_times[:1000],  # Store first 1000 for analysis
-                "min": min(execution_times),
-                "max": max(execution_times),
-                "mean": statistics.mean(execution_times),
-                "median": statistics.median(execution_times),
-                "p50": statistics.median(execution_times),
-                "p95": percentile(timings_sorted, 95),
-                "p99": percentile(timings_sorted, 99),
-                "stddev": statistics.stdev(execution_times) if len(execution_times) > 1 else 0.0,
-            }
-        else:
-            stats = {
-                "total_queries": 0,
-                "failed_queries": failed_queries,
-                "duration_seconds": actual_duration,
-                "qps": 0.0,
-                "raw_timings": [],
-                "min": None,
-                "max": None,
-                "mean": None,
-                "median": None,
-                "p50": None,
-                "p95": None,
-                "p99": None,
-                "stddev": 0.0,
-            }
-        
-        print(f"Done")
-        print(f"  Completed: {completed_queries} queries, Failed: {failed_queries}")
-        print(f"  QPS: {qps:.2f}, Duration: {actual_duration:.2f}s")
-        if execution_times:
-            print(f"  Latency: mean={stats['mean']:.2f}ms, p50={stats['p50']:.2f}ms, p95={stats['p95']:.2f}ms")
-        print()
-        
-        query_results.append({
-            "query_number": query_num,
-            "description": description,
-            "query": sql_query,
-            "statistics": stats
-        })
+    if driver == "asyncpg":
+        query_results = measure_throughput_asyncpg(queries, concurrency, duration_seconds,
+                                                   measure, plan_cache_mode)
+    else:
+        query_results = run_throughput_queries(queries, concurrency, duration_seconds,
+                                               measure, prepare, raw_values, plan_cache_mode)
     
     # Prepare results structure
     total_queries = sum(q["statistics"]["total_queries"] for q in query_results)
@@ -510,6 +1802,12 @@ def run_throughput_benchmark(scale: str = "small", index_config: str = "no_index
             "index_configuration": index_config,
             "concurrency": concurrency,
             "duration_seconds": duration_seconds,
+            "measure_mode": measure,
+            "prepared_statements": prepare,
+            "raw_values": raw_values,
+            "driver": driver,
+            "plan_cache_mode": PLAN_CACHE_MODES[plan_cache_mode],
+            "histogram_edges_ms": HISTOGRAM_EDGES_MS,
             "database": DEFAULT_CONFIG["database"],
             "host": DEFAULT_CONFIG["host"],
             "port": DEFAULT_CONFIG["port"],
@@ -525,7 +1823,7 @@ def run_throughput_benchmark(scale: str = "small", index_config: str = "no_index
     # Save results
     output_filename = f"throughput_{index_config}_{scale}.json"
     output_file = RESULTS_DIR / output_filename
-    save_results_json(results, output_file)
+    save_results_json(results, output_file, raw_sidecar=raw_sidecar)
     
     # Summary
     print("=" * 60)
@@ -539,8 +1837,16 @@ def run_throughput_benchmark(scale: str = "small", index_config: str = "no_index
     return True
 
 
-def main():
-    """Main function."""
+def main(argv=None):
+    """
+    Main function.
+    
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+    
+    Returns:
+        Process exit code
+    """
     parser = argparse.ArgumentParser(
         description="Run latency or throughput benchmarks for all queries"
     )
@@ -581,8 +1887,111 @@ def main():
         default=DEFAULT_MEASUREMENT_RUNS,
         help=f"Number of measurement runs per query for latency benchmark (default: {DEFAULT_MEASUREMENT_RUNS})"
     )
+    parser.add_argument(
+        "--measure-workers",
+        type=int,
+        default=DEFAULT_MEASURE_WORKERS,
+        help="Run latency measurement runs concurrently on N pooled connections "
+             f"(default: {DEFAULT_MEASURE_WORKERS}, serial). Shortens wall time but "
+             "perturbs latency."
+    )
+    parser.add_argument(
+        "--measure",
+        type=str,
+        default=DEFAULT_MEASURE_MODE,
+        choices=MEASURE_MODES,
+        help="How query runs are timed in latency and throughput modes: fetch all rows, "
+             "wrap in count(*), use the server-reported EXPLAIN ANALYZE time, or stream "
+             "the rows with binary COPY and discard them "
+             f"(default: {DEFAULT_MEASURE_MODE})"
+    )
+    parser.add_argument(
+        "--prepare",
+        action="store_true",
+        help="PREPARE each query once (per connection) and EXECUTE it on every latency "
+             "or throughput run, keeping parse and planning time out of the measurement"
+    )
+    parser.add_argument(
+        "--cache-mode",
+        type=str,
+        default=DEFAULT_CACHE_MODE,
+        choices=CACHE_MODES,
+        help="Evict caches before every (cold) or a random half (mixed) of the latency runs. "
+             "Without --evict-command this drops this machine's OS page cache (passwordless "
+             "sudo), so it needs a local database; runs whose eviction fails are recorded as "
+             f"warm (default: {DEFAULT_CACHE_MODE})"
+    )
+    parser.add_argument(
+        "--evict-command",
+        type=str,
+        help="Shell command run before every cold run to evict the database host's caches, "
+             "e.g. \"docker exec db sh -c 'sync; echo 3 > /proc/sys/vm/drop_caches'\"; "
+             "required for cold/mixed runs against a remote database"
+    )
+    raw_group = parser.add_mutually_exclusive_group()
+    raw_group.add_argument(
+        "--raw-sidecar",
+        action="store_true",
+        help="Write raw timings to a compressed .npz next to the results JSON "
+             "instead of inlining them"
+    )
+    raw_group.add_argument(
+        "--raw-ndjson",
+        action="store_true",
+        help="Latency mode: stream raw timings (ms, one per line) to "
+             "raw_<config>_<scale>_q<N>.ndjson while measuring instead of inlining them"
+    )
+    parser.add_argument(
+        "--schedule",
+        type=str,
+        default=DEFAULT_SCHEDULE,
+        choices=SCHEDULES,
+        help="Order of latency measurement runs across queries "
+             f"(default: {DEFAULT_SCHEDULE})"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for the random schedule and mixed cache mode (default: unseeded)"
+    )
+    parser.add_argument(
+        "--driver",
+        type=str,
+        default=DEFAULT_DRIVER,
+        choices=DRIVERS,
+        help="Client library; asyncpg is optional, gathers --measure-workers latency runs "
+             "concurrently and runs throughput workers as coroutines on one event loop "
+             f"(default: {DEFAULT_DRIVER})"
+    )
+    parser.add_argument(
+        "--plan-cache-mode",
+        type=str,
+        default=DEFAULT_PLAN_CACHE_MODE,
+        choices=list(PLAN_CACHE_MODES),
+        help="Pin prepared statements to generic or custom plans so the plan choice does "
+             f"not change during the measurement runs (default: {DEFAULT_PLAN_CACHE_MODE})"
+    )
+    parser.add_argument(
+        "--raw-values",
+        action="store_true",
+        help="Return numeric and date/time columns as strings instead of Decimal/datetime "
+             "objects, keeping psycopg2 value conversion out of fetchall timings"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only check that every query parses and plans (EXPLAIN without ANALYZE); "
+             "nothing is timed or saved"
+    )
+    
+    args = parser.parse_args(argv)
+    
+    if args.dry_run:
+        return 0 if dry_run(index_config=args.index_config) else 1
     
-    args = parser.parse_args()
+    # Created once here; the result writers assume the directory exists
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
     
     # If concurrency is specified, run throughput benchmark
     if args.concurrency is not None:
@@ -590,24 +1999,42 @@ def main():
             scale=args.scale,
             index_config=args.index_config,
             concurrency=args.concurrency,
-            duration_seconds=args.duration
+            duration_seconds=args.duration,
+            raw_sidecar=args.raw_sidecar,
+            measure=args.measure,
+            prepare=args.prepare,
+            raw_values=args.raw_values,
+            driver=args.driver,
+            plan_cache_mode=args.plan_cache_mode
         ):
-            sys.exit(0)
+            return 0
         else:
-            sys.exit(1)
+            return 1
     else:
         # Otherwise, run latency benchmark
         if run_benchmarks(
             scale=args.scale,
             index_config=args.index_config,
             warmup_runs=args.warmup_runs,
-            measurement_runs=args.measurement_runs
+            measurement_runs=args.measurement_runs,
+            measure_workers=args.measure_workers,
+            measure=args.measure,
+            prepare=args.prepare,
+            cache_mode=args.cache_mode,
+            raw_sidecar=args.raw_sidecar,
+            schedule=args.schedule,
+            seed=args.seed,
+            raw_ndjson=args.raw_ndjson,
+            driver=args.driver,
+            raw_values=args.raw_values,
+            plan_cache_mode=args.plan_cache_mode,
+            evict_command=args.evict_command
         ):
-            sys.exit(0)
+            return 0
         else:
-            sys.exit(1)
+            return 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
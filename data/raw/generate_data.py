@@ -4,19 +4,26 @@ Data generator for SQL Query Optimization Benchmarking.
 Generates synthetic, reproducible data for the e-commerce schema.
 """
 
+import os
 import random
 import csv
+import shutil
 import argparse
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
+import numpy as np
 
 # Fixed seed for reproducibility
 random.seed(42)
 
-# Output directory
+# Generator for the columns drawn in bulk with NumPy, same fixed seed
+rng = np.random.default_rng(42)
+
+# Output directory (created by main(), not on import)
 OUTPUT_DIR = Path(__file__).parent
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # Dataset size configurations by scale
 SCALE_CONFIGS = {
@@ -49,6 +56,30 @@ SCALE_CONFIGS = {
 # Default to small for backward compatibility
 DEFAULT_SCALE = "small"
 
+# CSV output: file buffer size and rows handed to writerows() per call
+CSV_BUFFER_SIZE = 1 << 20
+CSV_CHUNK_ROWS = 10000
+
+# Orders and order items are generated in this many contiguous shards, each
+# with its own seed. The count is fixed so the output does not depend on how
+# many worker processes run them.
+ORDER_SHARDS = 8
+
+# CSV columns of each table, in file order
+CATEGORIES_FIELDNAMES = ["category_id", "name", "description", "created_at"]
+PRODUCTS_FIELDNAMES = [
+    "product_id", "category_id", "name", "description", "price", "stock_quantity", "created_at"
+]
+CUSTOMERS_FIELDNAMES = [
+    "customer_id", "email", "first_name", "last_name", "country", "city", "created_at"
+]
+ORDERS_FIELDNAMES = [
+    "order_id", "customer_id", "order_date", "total_amount", "status", "shipping_country"
+]
+ORDER_ITEMS_FIELDNAMES = [
+    "order_item_id", "order_id", "product_id", "quantity", "unit_price", "subtotal"
+]
+
 # Sample data pools
 COUNTRIES = [
     "United States", "United Kingdom", "Germany", "France", "Italy",
@@ -74,12 +105,19 @@ CITIES = {
     "Poland": ["Warsaw", "Krakow", "Gdansk", "Wroclaw", "Poznan"]
 }
 
+# The pools as NumPy arrays so columns are drawn as index gathers.
+# CITY_MATRIX[country_idx, city_idx] holds the cities of COUNTRIES[country_idx].
+COUNTRY_ARRAY = np.array(COUNTRIES)
+CITY_MATRIX = np.array([CITIES[country] for country in COUNTRIES])
+
 FIRST_NAMES = [
     "James", "Mary", "John", "Patricia", "Robert", "Jennifer",
     "Michael", "Linda", "William", "Elizabeth", "David", "Barbara",
     "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah",
     "Charles", "Karen", "Christopher", "Nancy", "Daniel", "Lisa"
 ]
+FIRST_NAME_ARRAY = np.array(FIRST_NAMES)
+FIRST_NAME_LOWER = np.char.lower(FIRST_NAME_ARRAY)
 
 LAST_NAMES = [
     "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia",
@@ -87,6 +125,8 @@ LAST_NAMES = [
     "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson",
     "Martin", "Lee", "Thompson", "White", "Harris", "Sanchez"
 ]
+LAST_NAME_ARRAY = np.array(LAST_NAMES)
+LAST_NAME_LOWER = np.char.lower(LAST_NAME_ARRAY)
 
 CATEGORY_NAMES = [
     "Electronics", "Clothing", "Home & Garden", "Sports & Outdoors",
@@ -120,152 +160,482 @@ START_DATE = datetime.now() - timedelta(days=730)
 END_DATE = datetime.now()
 
 
+def random_timestamps(size, max_offset, unit="D"):
+    """
+    Draw ISO timestamps in bulk with NumPy datetime64.
+    
+    Args:
+        size: Number of timestamps
+        max_offset: Largest offset from START_DATE, inclusive
+        unit: NumPy unit of the offset ("D" days, "m" minutes)
+    
+    Returns:
+        Array of ISO 8601 strings with START_DATE's microsecond precision
+    """
+    offsets = rng.integers(0, max_offset + 1, size=size).astype(f"timedelta64[{unit}]")
+    return (np.datetime64(START_DATE) + offsets).astype(str)
+
+
+def category_base_name(category_id):
+    """
+    Name from CATEGORY_NAMES for a category ID.
+    
+    Scales with more categories than names reuse the names in order.
+    """
+    return CATEGORY_NAMES[(category_id - 1) % len(CATEGORY_NAMES)]
+
+
 def generate_categories(config):
-    """Generate categories data."""
-    categories = []
+    """
+    Generate categories data.
+    
+    Like every generator here, returns the table as a dictionary of columns.
+    Reused names get a numeric suffix ("Books 2").
+    """
     num_categories = config["num_categories"]
+    names = []
     for i in range(1, num_categories + 1):
-        category_name = CATEGORY_NAMES[i - 1]
-        categories.append({
-            "category_id": i,
-            "name": category_name,
-            "description": f"Products in the {category_name} category",
-            "created_at": (START_DATE + timedelta(days=random.randint(0, 100))).isoformat()
-        })
-    return categories
+        category_name = category_base_name(i)
+        if i > len(CATEGORY_NAMES):
+            category_name = f"{category_name} {(i - 1) // len(CATEGORY_NAMES) + 1}"
+        names.append(category_name)
+    return {
+        "category_id": np.arange(1, num_categories + 1),
+        "name": names,
+        "description": [f"Products in the {name} category" for name in names],
+        "created_at": random_timestamps(num_categories, 100),
+    }
 
 
 def generate_products(categories, config):
-    """Generate products data."""
-    products = []
-    product_id = 1
+    """
+    Generate products data.
+    
+    This is the last generator drawing per row from the random module; its
+    methods are bound to locals once instead of looked up on every call.
+    """
+    randint = random.randint
+    choice = random.choice
+    category_ids = []
+    names = []
+    descriptions = []
+    price_cents = []
+    stock_quantities = []
     num_products_target = config["num_products"]
+    num_categories = len(categories["category_id"])
     
-    for category in categories:
-        category_id = category["category_id"]
-        category_name = category["name"]
-        product_templates = PRODUCT_NAMES.get(category_name, ["Product"])
+    for category_id in categories["category_id"].tolist():
+        product_templates = PRODUCT_NAMES.get(category_base_name(category_id), ["Product"])
         
         # Generate products per category (adaptive based on target)
-        products_per_category = max(1, num_products_target // len(categories))
-        num_products = random.randint(products_per_category - 2, products_per_category + 2)
+        products_per_category = max(1, num_products_target // num_categories)
+        num_products = randint(products_per_category - 2, products_per_category + 2)
         for _ in range(num_products):
-            if product_id > num_products_target:
+            if len(names) >= num_products_target:
                 break
             
-            template = random.choice(product_templates)
-            product_name = f"{template} {random.randint(1, 999)}"
-            
-            products.append({
-                "product_id": product_id,
-                "category_id": category_id,
-                "name": product_name,
-                "description": f"High-quality {template.lower()} for everyday use",
-                "price": round(random.uniform(9.99, 999.99), 2),
-                "stock_quantity": random.randint(0, 500),
-                "created_at": (START_DATE + timedelta(days=random.randint(0, 200))).isoformat()
-            })
-            product_id += 1
+            template = choice(product_templates)
+            category_ids.append(category_id)
+            names.append(f"{template} {randint(1, 999)}")
+            descriptions.append(f"High-quality {template.lower()} for everyday use")
+            price_cents.append(randint(999, 99999))
+            stock_quantities.append(randint(0, 500))
     
-    return products
+    return {
+        "product_id": np.arange(1, len(names) + 1),
+        "category_id": np.array(category_ids),
+        "name": names,
+        "description": descriptions,
+        "price": np.array(price_cents) / 100,
+        "price_cents": np.array(price_cents),
+        "stock_quantity": np.array(stock_quantities),
+        "created_at": random_timestamps(len(names), 200),
+    }
 
 
 def generate_customers(config):
-    """Generate customers data."""
-    customers = []
+    """
+    Generate customers data.
+    
+    Names, countries and cities are drawn as bulk index arrays and gathered
+    from the pool arrays; a city is picked from its country's CITY_MATRIX row.
+    Emails are concatenated from the pre-lowercased name pools with NumPy
+    string operations.
+    """
     num_customers = config["num_customers"]
-    for i in range(1, num_customers + 1):
-        first_name = random.choice(FIRST_NAMES)
-        last_name = random.choice(LAST_NAMES)
-        country = random.choice(COUNTRIES)
-        city = random.choice(CITIES.get(country, ["Unknown"]))
-        email = f"{first_name.lower()}.{last_name.lower()}{i}@example.com"
-        
-        customers.append({
-            "customer_id": i,
-            "email": email,
-            "first_name": first_name,
-            "last_name": last_name,
-            "country": country,
-            "city": city,
-            "created_at": (START_DATE + timedelta(days=random.randint(0, 400))).isoformat()
-        })
-    return customers
-
-
-def generate_orders(customers, config):
-    """Generate orders data."""
-    orders = []
+    customer_ids = np.arange(1, num_customers + 1)
+    first_idx = rng.integers(0, len(FIRST_NAMES), size=num_customers)
+    last_idx = rng.integers(0, len(LAST_NAMES), size=num_customers)
+    country_idx = rng.integers(0, CITY_MATRIX.shape[0], size=num_customers)
+    city_idx = rng.integers(0, CITY_MATRIX.shape[1], size=num_customers)
+    
+    # first.last<customer_id>@example.com
+    emails = np.char.add(FIRST_NAME_LOWER[first_idx], ".")
+    emails = np.char.add(emails, LAST_NAME_LOWER[last_idx])
+    emails = np.char.add(emails, customer_ids.astype(str))
+    emails = np.char.add(emails, "@example.com")
+    
+    return {
+        "customer_id": customer_ids,
+        "email": emails,
+        "first_name": FIRST_NAME_ARRAY[first_idx],
+        "last_name": LAST_NAME_ARRAY[last_idx],
+        "country": COUNTRY_ARRAY[country_idx],
+        "city": CITY_MATRIX[country_idx, city_idx],
+        "created_at": random_timestamps(num_customers, 400),
+    }
+
+
+def generate_orders(customers, config, first_order_id=1, num_orders=None):
+    """
+    Generate orders data.
+    
+    Customers and statuses are drawn as indices in bulk. Customer IDs are
+    dense (1..N), so the shipping country is one gather from the customers'
+    country column. total_amount is left at zero for generate_order_items().
+    
+    Args:
+        customers: Generated customers
+        config: Scale configuration
+        first_order_id: ID of the first generated order
+        num_orders: Number of orders (default: config["num_orders"])
+    """
+    if num_orders is None:
+        num_orders = config["num_orders"]
+    customer_countries = np.asarray(customers["country"])
+    customer_idx = rng.integers(0, len(customer_countries), size=num_orders)
+    status_idx = rng.integers(0, len(ORDER_STATUSES), size=num_orders)
+    
+    # Any day of the range, at any minute of that day
+    max_minutes = (END_DATE - START_DATE).days * 24 * 60 + 24 * 60 - 1
+    
+    return {
+        "order_id": np.arange(first_order_id, first_order_id + num_orders),
+        "customer_id": customer_idx + 1,
+        "order_date": random_timestamps(num_orders, max_minutes, unit="m"),
+        "total_amount": np.zeros(num_orders),  # Will be calculated from order_items
+        "status": np.array(ORDER_STATUSES)[status_idx],
+        "shipping_country": customer_countries[customer_idx],
+    }
+
+
+def generate_order_items(orders, products, config, num_items=None, first_item_id=1):
+    """
+    Generate order items data.
+    
+    Item counts, products and quantities for all orders are drawn in a few
+    bulk NumPy calls and product columns are gathered by index. Amounts are
+    computed in integer cents and only divided into decimal columns at the
+    end, so no rounding is needed.
+    
+    Args:
+        orders: Generated orders; their total_amount is filled in
+        products: Generated products
+        config: Scale configuration
+        num_items: Number of items of each order (default: drawn here)
+        first_item_id: ID of the first generated order item
+    """
+    num_orders = len(orders["order_id"])
+    
+    # Items per order, then one product index and quantity per item
+    if num_items is None:
+        num_items = draw_items_per_order(num_orders, config)
+    total_items = int(num_items.sum())
+    product_idx = rng.integers(0, len(products["product_id"]), size=total_items)
+    quantities = rng.integers(1, 6, size=total_items)
+    
+    # Gather prices by product index, compute subtotals in one pass
+    unit_cents = products["price_cents"][product_idx]
+    subtotal_cents = unit_cents * quantities
+    
+    # Position of each item's order, and per-order totals summed by position
+    # (float64 sums of whole cents are exact far beyond any order total)
+    order_idx = np.repeat(np.arange(num_orders), num_items)
+    total_cents = np.bincount(order_idx, weights=subtotal_cents, minlength=num_orders)
+    orders["total_amount"] = total_cents.astype(np.int64) / 100
+    
+    return {
+        "order_item_id": np.arange(first_item_id, first_item_id + total_items),
+        "order_id": orders["order_id"][order_idx],
+        "product_id": products["product_id"][product_idx],
+        "quantity": quantities,
+        "unit_price": unit_cents / 100,
+        "subtotal": subtotal_cents / 100,
+    }
+
+
+def draw_items_per_order(num_orders, config):
+    """Draw the number of items of every order in one bulk call."""
+    return rng.integers(
+        config["min_items_per_order"], config["max_items_per_order"] + 1, size=num_orders
+    )
+
+
+def _init_order_worker(customers, products, config, output_dir, start_date, end_date):
+    """
+    Set up a process that generates order shards.
+    
+    The inputs are stored once per process rather than sent with every
+    shard, and the output directory and date range are copied from the
+    parent so every process uses the same values.
+    """
+    global _order_worker_inputs, OUTPUT_DIR, START_DATE, END_DATE
+    _order_worker_inputs = (customers, products, config)
+    OUTPUT_DIR = output_dir
+    START_DATE = start_date
+    END_DATE = end_date
+
+
+def generate_order_shard_tables(customers, products, config, first_order_id, num_items,
+                                first_item_id, seed):
+    """
+    Generate the orders and order items of one shard.
+    
+    The NumPy generator is reseeded with the shard's seed, so a shard's
+    output is the same in whichever process it runs.
+    
+    Returns:
+        Tuple of (orders, order_items) tables
+    """
+    global rng
+    rng = np.random.default_rng(seed)
+    
+    orders = generate_orders(customers, config, first_order_id, len(num_items))
+    order_items = generate_order_items(orders, products, config, num_items, first_item_id)
+    return orders, order_items
+
+
+def order_shard_args(config):
+    """
+    Split the orders of a scale into ORDER_SHARDS shards.
+    
+    Item counts for all orders are drawn up front, which fixes each shard's
+    first item ID.
+    
+    Returns:
+        List of (shard, first_order_id, num_items, first_item_id, seed) tuples
+    """
     num_orders = config["num_orders"]
-    for i in range(1, num_orders + 1):
-        customer = random.choice(customers)
-        order_date = START_DATE + timedelta(
-            days=random.randint(0, (END_DATE - START_DATE).days),
-            hours=random.randint(0, 23),
-            minutes=random.randint(0, 59)
+    num_items = draw_items_per_order(num_orders, config)
+    bounds = np.linspace(0, num_orders, ORDER_SHARDS + 1).astype(int)
+    item_offsets = np.concatenate([[0], np.cumsum(num_items)])
+    seeds = np.random.SeedSequence(42).generate_state(ORDER_SHARDS).tolist()
+    
+    return [
+        (shard, int(start) + 1, num_items[start:end], int(item_offsets[start]) + 1, seeds[shard])
+        for shard, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))
+    ]
+
+
+def iter_order_shards(customers, products, config):
+    """
+    Generate orders and order items shard by shard in this process.
+    
+    Yields the same rows as generate_orders_and_items() writes, but only
+    one shard is held in memory at a time.
+    
+    Yields:
+        Tuple of (orders, order_items) tables per shard
+    """
+    for _, first_order_id, num_items, first_item_id, seed in order_shard_args(config):
+        yield generate_order_shard_tables(
+            customers, products, config, first_order_id, num_items, first_item_id, seed
         )
-        
-        orders.append({
-            "order_id": i,
-            "customer_id": customer["customer_id"],
-            "order_date": order_date.isoformat(),
-            "total_amount": 0.0,  # Will be calculated from order_items
-            "status": random.choice(ORDER_STATUSES),
-            "shipping_country": customer["country"]
-        })
-    return orders
-
-
-def generate_order_items(orders, products, config):
-    """Generate order items data."""
-    order_items = []
-    item_id = 1
-    min_items = config["min_items_per_order"]
-    max_items = config["max_items_per_order"]
-    
-    # Group orders by order_id for efficient lookup
-    orders_by_id = {order["order_id"]: order for order in orders}
-    
-    for order in orders:
-        order_id = order["order_id"]
-        num_items = random.randint(min_items, max_items)
-        order_total = 0.0
-        
-        for _ in range(num_items):
-            product = random.choice(products)
-            quantity = random.randint(1, 5)
-            unit_price = product["price"]
-            subtotal = round(unit_price * quantity, 2)
-            order_total += subtotal
-            
-            order_items.append({
-                "order_item_id": item_id,
-                "order_id": order_id,
-                "product_id": product["product_id"],
-                "quantity": quantity,
-                "unit_price": unit_price,
-                "subtotal": subtotal
-            })
-            item_id += 1
-        
-        # Update order total
-        order["total_amount"] = round(order_total, 2)
+
+
+def generate_order_shard(shard, first_order_id, num_items, first_item_id, seed):
+    """
+    Generate one shard of orders and their items into headerless part files.
+    
+    Args:
+        shard: Shard number, used in the part file names
+        first_order_id: ID of the shard's first order
+        num_items: Number of items of each order in the shard
+        first_item_id: ID of the shard's first order item
+        seed: Seed of the shard
     
-    return order_items
+    Returns:
+        Tuple of (number of orders, number of order items)
+    """
+    customers, products, config = _order_worker_inputs
+    orders, order_items = generate_order_shard_tables(
+        customers, products, config, first_order_id, num_items, first_item_id, seed
+    )
+    
+    # IDs, amounts, ISO dates and values from ORDER_STATUSES / COUNTRIES only,
+    # so neither table ever needs CSV quoting
+    write_csv(f"order_items.part{shard}.csv", order_items, ORDER_ITEMS_FIELDNAMES,
+              header=False, plain=True)
+    write_csv(f"orders.part{shard}.csv", orders, ORDERS_FIELDNAMES, header=False, plain=True)
+    return len(orders["order_id"]), len(order_items["order_item_id"])
 
 
-def write_csv(filename, data, fieldnames):
-    """Write data to CSV file."""
+def generate_orders_and_items(customers, products, config, jobs=1):
+    """
+    Generate orders and order items in ORDER_SHARDS shards and write
+    orders.csv and order_items.csv.
+    
+    Shards run in up to `jobs` worker processes, each writing its own part
+    files, which are concatenated in shard order.
+    
+    Args:
+        customers: Generated customers
+        products: Generated products
+        config: Scale configuration
+        jobs: Number of worker processes (1 runs every shard in this process)
+    
+    Returns:
+        Tuple of (number of orders, number of order items)
+    """
+    shard_args = order_shard_args(config)
+    init_args = (customers, products, config, OUTPUT_DIR, START_DATE, END_DATE)
+    
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, ORDER_SHARDS),
+                                 initializer=_init_order_worker, initargs=init_args) as executor:
+            counts = list(executor.map(generate_order_shard, *zip(*shard_args)))
+    else:
+        _init_order_worker(*init_args)
+        counts = [generate_order_shard(*args) for args in shard_args]
+    
+    # Concatenate the part files of both tables at the same time
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(
+            concatenate_parts,
+            ["order_items.csv", "orders.csv"],
+            [ORDER_ITEMS_FIELDNAMES, ORDERS_FIELDNAMES],
+        ))
+    
+    total_orders = sum(orders for orders, _ in counts)
+    total_items = sum(items for _, items in counts)
+    print(f"Generated order_items.csv: {total_items} records")
+    print(f"Generated orders.csv: {total_orders} records")
+    return total_orders, total_items
+
+
+def concatenate_parts(filename, fieldnames):
+    """
+    Join a table's shard part files behind one header, in shard order.
+    
+    The copy runs on binary files, so it is plain buffered I/O that
+    releases the GIL and can run alongside other writers.
+    
+    Args:
+        filename: CSV file name inside OUTPUT_DIR
+        fieldnames: Header columns
+    """
+    with open(OUTPUT_DIR / filename, "wb", buffering=CSV_BUFFER_SIZE) as out:
+        out.write((",".join(fieldnames) + "\r\n").encode("utf-8"))
+        for shard in range(ORDER_SHARDS):
+            part = OUTPUT_DIR / f"{Path(filename).stem}.part{shard}.csv"
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out, CSV_BUFFER_SIZE)
+            part.unlink()
+
+
+def iter_column_chunks(table, fieldnames):
+    """
+    Slice selected columns into chunks of CSV_CHUNK_ROWS values.
+    
+    Only each chunk is converted to Python objects, so NumPy columns never
+    exist as full Python lists.
+    
+    Args:
+        table: Dictionary of columns (lists or NumPy arrays)
+        fieldnames: Columns to include, in order
+    
+    Yields:
+        List of per-column value lists per chunk
+    """
+    columns = [table[name] for name in fieldnames]
+    for start in range(0, len(columns[0]), CSV_CHUNK_ROWS):
+        # NumPy slices become Python lists so values format as usual
+        yield [
+            column[start:start + CSV_CHUNK_ROWS].tolist() if isinstance(column, np.ndarray)
+            else column[start:start + CSV_CHUNK_ROWS]
+            for column in columns
+        ]
+
+
+def iter_row_chunks(table, fieldnames):
+    """
+    Turn selected columns into rows, CSV_CHUNK_ROWS at a time.
+    
+    Yields:
+        Iterator of row tuples per chunk
+    """
+    for chunk in iter_column_chunks(table, fieldnames):
+        yield zip(*chunk)
+
+
+@lru_cache(maxsize=None)
+def plain_row_formatter(num_columns):
+    """
+    Compile a function that formats one CSV line from `num_columns` values.
+    
+    The generated function is a single f-string,
+    ``def format_row(c0, c1, ...): return f"{c0},{c1},...\\r\\n"``, so it
+    skips csv.writer's per-field quoting checks. It is only correct for
+    values that never need quoting (numbers and strings without commas,
+    quotes or newlines). Floats and ints format as csv.writer would.
+    
+    Args:
+        num_columns: Number of values per line
+    
+    Returns:
+        Function taking one argument per column and returning the line
+    """
+    params = [f"c{i}" for i in range(num_columns)]
+    fields = ",".join(f"{{{param}}}" for param in params)
+    source = f"def format_row({', '.join(params)}):\n    return f\"{fields}\\r\\n\"\n"
+    namespace = {}
+    exec(source, namespace)
+    return namespace["format_row"]
+
+
+def write_csv(filename, table, fieldnames, header=True, plain=False):
+    """
+    Write data to CSV file.
+    
+    Rows from iter_row_chunks() go through csv.writer and a large file
+    buffer. Tables whose values never need quoting can skip csv.writer and
+    be formatted by plain_row_formatter() instead.
+    
+    Args:
+        filename: File name inside OUTPUT_DIR
+        table: Dictionary of columns (lists or NumPy arrays)
+        fieldnames: Columns to write, in order
+        header: Write the header row and report the file (False for part files)
+        plain: No value contains commas, quotes or newlines
+    """
     filepath = OUTPUT_DIR / filename
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
-    print(f"Generated {filename}: {len(data)} records")
+    with open(filepath, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(fieldnames)
+        if plain:
+            format_row = plain_row_formatter(len(fieldnames))
+            for chunk in iter_column_chunks(table, fieldnames):
+                f.writelines(map(format_row, *chunk))
+        else:
+            for rows in iter_row_chunks(table, fieldnames):
+                writer.writerows(rows)
+    if header:
+        print(f"Generated {filename}: {len(table[fieldnames[0]])} records")
 
 
-def main():
-    """Main function to generate all data files."""
+def main(argv=None):
+    """
+    Main function to generate all data files.
+    
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+    
+    Returns:
+        Process exit code
+    """
+    global OUTPUT_DIR
+    
     parser = argparse.ArgumentParser(
         description="Generate synthetic data for SQL Query Optimization Benchmarking"
     )
@@ -276,44 +646,67 @@ def main():
         choices=["small", "medium", "large"],
         help=f"Dataset scale (default: {DEFAULT_SCALE})"
     )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=str(OUTPUT_DIR),
+        help="Directory to write the CSV files to (default: data/raw)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for generating order shards (default: number of CPUs); "
+             "the output is the same for any value"
+    )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     scale = args.scale
+    
+    OUTPUT_DIR = Path(args.output_dir)
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     config = SCALE_CONFIGS[scale]
     
     print(f"Generating synthetic data (seed=42, scale={scale})...")
     print(f"Dataset size: {config['num_customers']} customers, {config['num_orders']} orders")
+    print(f"Output directory: {OUTPUT_DIR}")
     print()
     
-    # Generate data in dependency order
-    print("Generating categories...")
-    categories = generate_categories(config)
-    write_csv("categories.csv", categories, ["category_id", "name", "description", "created_at"])
-    
-    print("Generating products...")
-    products = generate_products(categories, config)
-    write_csv("products.csv", products, ["product_id", "category_id", "name", "description", "price", "stock_quantity", "created_at"])
-    
-    print("Generating customers...")
-    customers = generate_customers(config)
-    write_csv("customers.csv", customers, ["customer_id", "email", "first_name", "last_name", "country", "city", "created_at"])
-    
-    print("Generating orders...")
-    orders = generate_orders(customers, config)
+    # Generate data in dependency order. Each table is written on a thread
+    # while the next one is generated; the writes finish before the order
+    # shards fork worker processes.
+    with ThreadPoolExecutor(max_workers=3) as writers:
+        print("Generating categories...")
+        categories = generate_categories(config)
+        writes = [writers.submit(write_csv, "categories.csv", categories, CATEGORIES_FIELDNAMES)]
+        
+        print("Generating products...")
+        products = generate_products(categories, config)
+        writes.append(writers.submit(write_csv, "products.csv", products, PRODUCTS_FIELDNAMES))
+        
+        print("Generating customers...")
+        customers = generate_customers(config)
+        writes.append(writers.submit(write_csv, "customers.csv", customers, CUSTOMERS_FIELDNAMES))
     
-    print("Generating order items...")
-    order_items = generate_order_items(orders, products, config)
-    write_csv("order_items.csv", order_items, ["order_item_id", "order_id", "product_id", "quantity", "unit_price", "subtotal"])
+    # Re-raise any write error
+    for write in writes:
+        write.result()
     
-    # Write orders after calculating totals
-    write_csv("orders.csv", orders, ["order_id", "customer_id", "order_date", "total_amount", "status", "shipping_country"])
+    print(f"Generating orders and order items ({ORDER_SHARDS} shards, {max(1, args.jobs)} jobs)...")
+    num_orders, num_order_items = generate_orders_and_items(
+        customers, products, config, jobs=max(1, args.jobs)
+    )
     
     print()
     print("Data generation complete!")
-    print(f"Total records: {len(categories)} categories, {len(products)} products, "
-          f"{len(customers)} customers, {len(orders)} orders, {len(order_items)} order items")
+    print(f"Total records: {len(categories['category_id'])} categories, "
+          f"{len(products['product_id'])} products, "
+          f"{len(customers['customer_id'])} customers, {num_orders} orders, "
+          f"{num_order_items} order items")
+    
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
@@ -2,24 +2,217 @@
 """
 Script to apply the database schema to PostgreSQL.
 This script can be used to test that the schema.sql file is valid.
+With --load, it also generates a dataset and COPYs it straight into the new
+tables without writing CSV files.
 """
 
+import io
+import csv
 import sys
+import queue
+import argparse
+import importlib
+import threading
 import psycopg2
+from itertools import chain, islice
 from pathlib import Path
 
-# Database connection parameters
-DB_CONFIG = {
-    "host": "localhost",
-    "port": 5432,
-    "database": "benchmark_db",
-    "user": "benchmark",
-    "password": "benchmark",
-}
+# Project directories of the scripts imported in-process: the data loader
+# (database configuration) and the data generator (--load)
+PROJECT_ROOT = Path(__file__).parent.parent
+BENCHMARKS_DIR = PROJECT_ROOT / "benchmarks"
+GENERATOR_DIR = PROJECT_ROOT / "data" / "raw"
 
+# Bytes requested from the row stream per COPY chunk (1 MiB)
+COPY_BUFFER_SIZE = 1 << 20
 
-def apply_schema():
-    """Apply the schema.sql file to the database."""
+# Rows rendered to CSV per chunk of the row stream (--chunk-rows)
+STREAM_CHUNK_ROWS = 50000
+
+# Rendered chunks buffered ahead of COPY
+STREAM_PREFETCH_CHUNKS = 2
+
+
+def import_script(directory, name):
+    """
+    Import a project script as a module, adding its directory to sys.path.
+    
+    Scripts are imported only when needed: generate_data seeds the global
+    random generators on import, which plain schema runs should not do.
+    
+    Args:
+        directory: Directory containing the script
+        name: Module name of the script
+    
+    Returns:
+        The imported module
+    """
+    path = str(directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(name)
+
+
+def get_db_config():
+    """Return the data loader's database configuration (DB_HOST, DB_PORT, ... env vars)."""
+    return import_script(BENCHMARKS_DIR, "load_data").DEFAULT_CONFIG
+
+
+class CsvRowStream:
+    """
+    Read-only file-like object that renders rows as CSV bytes for COPY.
+    
+    A background thread formats rows into chunks of `chunk_rows` while
+    copy_expert() sends earlier chunks (psycopg2 releases the GIL while it
+    writes to the socket), so row formatting overlaps with the server
+    parsing and inserting. At most STREAM_PREFETCH_CHUNKS chunks wait in
+    the queue, so memory stays bounded by the chunk size.
+    """
+    
+    def __init__(self, rows, chunk_rows=STREAM_CHUNK_ROWS):
+        self._chunks = queue.Queue(maxsize=STREAM_PREFETCH_CHUNKS)
+        self._pending = bytearray()
+        self._exhausted = False
+        self._closed = threading.Event()
+        self._thread = threading.Thread(
+            target=self._render, args=(iter(rows), chunk_rows), daemon=True
+        )
+        self._thread.start()
+    
+    def _render(self, rows, chunk_rows):
+        """Render chunks until the rows run out (b"") or an error (the exception)."""
+        text = io.StringIO()
+        writer = csv.writer(text)
+        try:
+            while True:
+                text.seek(0)
+                text.truncate()
+                writer.writerows(islice(rows, chunk_rows))
+                data = text.getvalue().encode("utf-8")
+                if not self._put(data) or not data:
+                    return
+        except Exception as e:
+            self._put(e)
+    
+    def _put(self, item):
+        """Queue an item; False if the stream was closed while waiting."""
+        while not self._closed.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def read(self, size=-1):
+        """Return up to `size` bytes of CSV (everything left if negative)."""
+        while not self._exhausted and (size < 0 or len(self._pending) < size):
+            chunk = self._chunks.get()
+            if isinstance(chunk, Exception):
+                self._exhausted = True
+                raise chunk
+            if chunk:
+                self._pending += chunk
+            else:
+                self._exhausted = True
+        if size < 0:
+            size = len(self._pending)
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        return data
+    
+    def readline(self, size=-1):
+        """Line reads are not needed by COPY; behave like read()."""
+        return self.read(size)
+    
+    def close(self):
+        """Stop the render thread, e.g. after COPY failed part way."""
+        self._closed.set()
+        self._thread.join()
+
+
+def load_generated(conn, table, row_iter, columns, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    COPY rows produced in this process into a table, without a CSV file.
+    
+    Args:
+        conn: Database connection
+        table: Target table name
+        row_iter: Iterable of row tuples in column order
+        columns: Column names of the rows
+        chunk_rows: Rows rendered per CSV chunk
+    
+    Returns:
+        Number of rows copied
+    """
+    cursor = conn.cursor()
+    stream = CsvRowStream(row_iter, chunk_rows)
+    try:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH CSV",
+            stream,
+            size=COPY_BUFFER_SIZE,
+        )
+    finally:
+        stream.close()
+    count = cursor.rowcount
+    cursor.close()
+    return count
+
+
+def load_scale(conn, scale, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Generate a dataset in-process and load every table with load_generated().
+    
+    Orders and order items are generated and loaded one shard at a time,
+    each shard's orders before its items, so foreign keys hold after every
+    COPY and only one shard is held in memory. The tables are analyzed
+    afterwards so the planner has statistics for the loaded data.
+    
+    Args:
+        conn: Database connection with the schema applied
+        scale: Dataset scale (small, medium, large)
+        chunk_rows: Rows rendered per CSV chunk
+    """
+    gen = import_script(GENERATOR_DIR, "generate_data")
+    
+    config = gen.SCALE_CONFIGS[scale]
+    print(f"\nLoading generated {scale} dataset (no CSV files)...")
+    
+    def load(table, data, fieldnames):
+        rows = chain.from_iterable(gen.iter_row_chunks(data, fieldnames))
+        return load_generated(conn, table, rows, fieldnames, chunk_rows)
+    
+    categories = gen.generate_categories(config)
+    print(f"  categories: {load('categories', categories, gen.CATEGORIES_FIELDNAMES)} records")
+    products = gen.generate_products(categories, config)
+    print(f"  products: {load('products', products, gen.PRODUCTS_FIELDNAMES)} records")
+    customers = gen.generate_customers(config)
+    print(f"  customers: {load('customers', customers, gen.CUSTOMERS_FIELDNAMES)} records")
+    
+    num_orders = num_order_items = 0
+    for orders, order_items in gen.iter_order_shards(customers, products, config):
+        num_orders += load("orders", orders, gen.ORDERS_FIELDNAMES)
+        num_order_items += load("order_items", order_items, gen.ORDER_ITEMS_FIELDNAMES)
+    print(f"  orders: {num_orders} records")
+    print(f"  order_items: {num_order_items} records")
+    
+    # Refresh planner statistics, as load_data.py does after its COPYs
+    tables = ["categories", "products", "customers", "orders", "order_items"]
+    print("Analyzing tables...")
+    cursor = conn.cursor()
+    cursor.execute(f"ANALYZE {', '.join(tables)}")
+    cursor.close()
+
+
+def apply_schema(scale=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Apply the schema.sql file to the database.
+    
+    Args:
+        scale: If set, generate this dataset scale and load it after the DDL
+        chunk_rows: Rows rendered per CSV chunk when loading
+    """
     schema_path = Path(__file__).parent.parent / "sql" / "schema.sql"
     
     if not schema_path.exists():
@@ -27,17 +220,17 @@ def apply_schema():
         sys.exit(1)
     
     try:
-        # Read the schema file
-        with open(schema_path, "r", encoding="utf-8") as f:
-            schema_sql = f.read()
+        # Read the schema file in one binary read and decode it once
+        schema_sql = schema_path.read_bytes().decode("utf-8")
         
         # Connect to database
         print("Connecting to database...")
-        conn = psycopg2.connect(**DB_CONFIG)
+        conn = psycopg2.connect(**get_db_config())
         conn.autocommit = True
         cursor = conn.cursor()
         
-        # Execute schema
+        # Execute schema. All statements go in one simple-protocol message,
+        # so the whole file costs a single round trip.
         print("Applying schema...")
         cursor.execute(schema_sql)
         
@@ -55,14 +248,18 @@ def apply_schema():
         for table in tables:
             print(f"  - {table[0]}")
         
+        if scale is not None:
+            load_scale(conn, scale, chunk_rows)
+        
         cursor.close()
         conn.close()
         print("\nSchema validation complete.")
         
     except psycopg2.OperationalError as e:
         print(f"Error connecting to database: {e}")
-        print("\nMake sure PostgreSQL is running:")
+        print("\nMake sure PostgreSQL is running and check your environment variables:")
         print("  docker-compose up -d db")
+        print("  DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD")
         sys.exit(1)
     except psycopg2.Error as e:
         print(f"Error applying schema: {e}")
@@ -72,6 +269,35 @@ def apply_schema():
         sys.exit(1)
 
 
+def main(argv=None):
+    """
+    Main function.
+    
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(description="Apply the database schema to PostgreSQL")
+    parser.add_argument(
+        "--load",
+        choices=["small", "medium", "large"],
+        metavar="SCALE",
+        help="After the DDL, generate this dataset scale (small, medium, large) "
+             "and COPY it straight into the tables without CSV files"
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=STREAM_CHUNK_ROWS,
+        help=f"Rows rendered to CSV per COPY chunk with --load (default: {STREAM_CHUNK_ROWS})"
+    )
+    args = parser.parse_args(argv)
+    
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows must be at least 1")
+    
+    apply_schema(scale=args.load, chunk_rows=args.chunk_rows)
+
+
 if __name__ == "__main__":
-    apply_schema()
+    main()
 